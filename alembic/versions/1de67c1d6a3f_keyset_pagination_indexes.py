@@ -0,0 +1,32 @@
+"""keyset pagination indexes
+
+Revision ID: 1de67c1d6a3f
+Revises: 8f8ef5aafdcc
+Create Date: 2026-10-19 11:02:17.334920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1de67c1d6a3f'
+down_revision: Union[str, Sequence[str], None] = '8f8ef5aafdcc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_notes_owner_id_created_at_id', 'notes', ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_documents_owner_id_created_at_id', 'documents', ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_users_created_at_id', 'users', [sa.text('created_at DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    op.drop_index('ix_documents_owner_id_created_at_id', table_name='documents')
+    op.drop_index('ix_notes_owner_id_created_at_id', table_name='notes')
@@ -0,0 +1,59 @@
+"""chunks owner_id
+
+Revision ID: 3b7f0e9c2d61
+Revises: 5c2e7d1a9b34
+Create Date: 2026-10-19 16:22:07.514930
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7f0e9c2d61'
+down_revision: Union[str, Sequence[str], None] = '5c2e7d1a9b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 50_000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chunks', sa.Column('owner_id', postgresql.UUID(as_uuid=True), nullable=True))
+
+    # Keyset batches over the primary key, so each UPDATE stays bounded and every row is
+    # visited once; the whole migration is still one transaction. Chunks of documents
+    # whose owner was deleted keep a NULL owner, like the document itself.
+    conn = op.get_bind()
+    last = str(uuid.UUID(int=0))
+    while True:
+        upper = conn.execute(sa.text(
+            "SELECT max(id) FROM (SELECT id FROM chunks WHERE id > CAST(:last AS uuid) ORDER BY id LIMIT :n) batch"
+        ), {"last": last, "n": BACKFILL_BATCH}).scalar()
+        if upper is None:
+            break
+        conn.execute(sa.text(
+            "UPDATE chunks c SET owner_id = d.owner_id FROM documents d "
+            "WHERE c.id > CAST(:last AS uuid) AND c.id <= CAST(:upper AS uuid) "
+            "AND d.id = c.document_id AND d.owner_id IS NOT NULL"
+        ), {"last": last, "upper": str(upper)})
+        last = str(upper)
+
+    op.create_foreign_key('fk_chunks_owner_id_users', 'chunks', 'users', ['owner_id'], ['id'], ondelete='SET NULL')
+    op.create_index('ix_chunks_owner_id_created_at', 'chunks', ['owner_id', 'created_at'], unique=False)
+    # Serves the FK cascade from documents too, so the single-column index goes
+    op.create_index('ix_chunks_document_id_chunk_index', 'chunks', ['document_id', 'chunk_index'], unique=False)
+    op.drop_index('ix_chunks_document_id', table_name='chunks')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_chunks_document_id', 'chunks', ['document_id'], unique=False)
+    op.drop_index('ix_chunks_document_id_chunk_index', table_name='chunks')
+    op.drop_index('ix_chunks_owner_id_created_at', table_name='chunks')
+    op.drop_constraint('fk_chunks_owner_id_users', 'chunks', type_='foreignkey')
+    op.drop_column('chunks', 'owner_id')
@@ -0,0 +1,36 @@
+"""rag index artifacts
+
+Revision ID: 5c2e7d1a9b34
+Revises: 98053b598df8
+Create Date: 2026-10-19 14:05:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2e7d1a9b34'
+down_revision: Union[str, Sequence[str], None] = '98053b598df8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rag_index_artifacts',
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('version', sa.String(length=64), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    # Multi-MB numeric blobs: store out of line without pglz compression (cheaper writes, little size gain)
+    op.execute("ALTER TABLE rag_index_artifacts ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rag_index_artifacts')
@@ -0,0 +1,94 @@
+"""partition audit_logs by month
+
+Revision ID: 8f8ef5aafdcc
+Revises: 9caa8878d52e
+Create Date: 2026-10-19 10:12:41.508113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '8f8ef5aafdcc'
+down_revision: Union[str, Sequence[str], None] = '9caa8878d52e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Monthly partitions from the oldest existing row up to 3 months ahead.
+# Same naming as app.services.audit_partitions, which keeps creating them afterwards.
+CREATE_PARTITIONS = """
+DO $$
+DECLARE
+    m date := date_trunc('month', COALESCE((SELECT min(created_at) FROM audit_logs_legacy), now()) AT TIME ZONE 'UTC')::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months')::date;
+BEGIN
+    WHILE m <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+            'audit_logs_y' || to_char(m, 'YYYY') || 'm' || to_char(m, 'MM'),
+            m::timestamp AT TIME ZONE 'UTC',
+            (m + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+        );
+        m := (m + interval '1 month')::date;
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_audit_logs_event_type', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_created_at', table_name='audit_logs')
+    op.drop_index('ix_audit_logs_actor_user_id', table_name='audit_logs')
+    op.rename_table('audit_logs', 'audit_logs_legacy')
+    op.execute("ALTER TABLE audit_logs_legacy RENAME CONSTRAINT audit_logs_pkey TO audit_logs_legacy_pkey")
+
+    op.execute("""
+        CREATE TABLE audit_logs (
+            id UUID NOT NULL,
+            actor_user_id UUID REFERENCES users (id) ON DELETE SET NULL,
+            event_type VARCHAR(50) NOT NULL,
+            details JSONB,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE INDEX ix_audit_logs_actor_user_id_created_at ON audit_logs (actor_user_id, created_at DESC, id DESC)")
+    op.execute("CREATE INDEX ix_audit_logs_event_type_created_at ON audit_logs (event_type, created_at DESC, id DESC)")
+    op.execute(CREATE_PARTITIONS)
+
+    op.execute("""
+        INSERT INTO audit_logs (id, actor_user_id, event_type, details, created_at)
+        SELECT id, actor_user_id, event_type, details, created_at FROM audit_logs_legacy
+    """)
+    op.drop_table('audit_logs_legacy')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('audit_logs', 'audit_logs_partitioned')
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    op.execute("ALTER INDEX ix_audit_logs_actor_user_id_created_at RENAME TO ix_audit_logs_partitioned_actor")
+    op.execute("ALTER INDEX ix_audit_logs_event_type_created_at RENAME TO ix_audit_logs_partitioned_event")
+
+    op.create_table('audit_logs',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('actor_user_id', sa.UUID(), nullable=True),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('details', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['actor_user_id'], ['users.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute("""
+        INSERT INTO audit_logs (id, actor_user_id, event_type, details, created_at)
+        SELECT id, actor_user_id, event_type, details, created_at FROM audit_logs_partitioned
+    """)
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.create_index(op.f('ix_audit_logs_actor_user_id'), 'audit_logs', ['actor_user_id'], unique=False)
+    op.create_index(op.f('ix_audit_logs_created_at'), 'audit_logs', ['created_at'], unique=False)
+    op.create_index(op.f('ix_audit_logs_event_type'), 'audit_logs', ['event_type'], unique=False)
@@ -0,0 +1,43 @@
+"""notes full text search
+
+Revision ID: 98053b598df8
+Revises: 1de67c1d6a3f
+Create Date: 2026-10-19 11:48:55.902311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '98053b598df8'
+down_revision: Union[str, Sequence[str], None] = '1de67c1d6a3f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Lets one GIN index cover both the owner_id filter and the tsvector match
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # Adding a STORED generated column rewrites the table; run during a maintenance window on large deployments
+    op.add_column('notes', sa.Column(
+        'search_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_notes_owner_id_search_tsv', 'notes', ['owner_id', 'search_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_notes_owner_id_search_tsv', table_name='notes', postgresql_using='gin')
+    op.drop_column('notes', 'search_tsv')
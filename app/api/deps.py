@@ -3,6 +3,7 @@ from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.core.auth_cache import CachedUser, cache_claims, cache_user, get_cached_claims, get_cached_user, user_cache_generation
 from app.core.security import decode_access_token
 from app.db.session import get_db
 from app.models.user import User
@@ -13,29 +14,41 @@ bearer_scheme = HTTPBearer(auto_error=False)
 def get_current_user(
     creds: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
     db: Session = Depends(get_db),
-) -> User:
+) -> CachedUser:
     if creds is None or creds.scheme.lower() != "bearer":
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
 
     token = creds.credentials
-    try:
-        payload = decode_access_token(token)
-    except Exception:
-        # Do not leak details (expired vs invalid)
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    payload = get_cached_claims(token)
+    if payload is None:
+        try:
+            payload = decode_access_token(token)
+        except Exception:
+            # Do not leak details (expired vs invalid)
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        cache_claims(token, payload)
 
     user_id = payload.get("sub")
     if not user_id:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-    user = db.scalar(select(User).where(User.id == user_id))
-    if not user or not user.is_active:
+    # Cache hit: no DB round trip (the Session only connects on first use).
+    # admin.update_user invalidates this entry on every worker.
+    user = get_cached_user(user_id)
+    if user is None:
+        generation = user_cache_generation()
+        row = db.scalar(select(User).where(User.id == user_id))
+        if not row:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        user = cache_user(row, generation)
+
+    if not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
     return user
 
 
-def require_admin(current_user: User = Depends(get_current_user)) -> User:
+def require_admin(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
     if current_user.role != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin required")
     return current_user
@@ -0,0 +1,100 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Callable
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy import Select, tuple_
+
+from app.core.config import settings
+from app.core.rate_limiter import get_redis
+
+
+def _encode(values: list) -> str:
+    raw = json.dumps(values, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode(cursor: str) -> list:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """
+    Opaque keyset cursor for (created_at, id) DESC ordering.
+    """
+    return _encode([created_at.isoformat(), str(row_id)])
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        ts, row_id = _decode(cursor)
+        return datetime.fromisoformat(ts), uuid.UUID(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def encode_rank_cursor(rank: float, row_id) -> str:
+    """
+    Opaque keyset cursor for (rank, id) DESC ordering (search results).
+    """
+    return _encode([float(rank), str(row_id)])
+
+
+def decode_rank_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        rank, row_id = _decode(cursor)
+        return float(rank), uuid.UUID(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+
+
+def keyset_page(stmt: Select, created_col, id_col, limit: int, cursor: str | None) -> Select:
+    """
+    Newest-first page after `cursor`. Backed by (..., created_at DESC, id DESC) indexes,
+    so the cost is O(limit) however deep the page is.
+    """
+    if cursor:
+        stmt = stmt.where(tuple_(created_col, id_col) < decode_cursor(cursor))
+    return stmt.order_by(created_col.desc(), id_col.desc()).limit(limit)
+
+
+def next_cursor(rows, limit: int) -> str | None:
+    if len(rows) < limit:
+        return None
+    return encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+def _total_key(prefix: str, identifier: str) -> str:
+    return f"total:{prefix}:{identifier}"
+
+
+def cached_total(prefix: str, identifier: str, compute: Callable[[], int]) -> int:
+    """
+    Exact COUNT(*) cached in Redis for a short TTL; computed directly if Redis is down.
+    """
+    key = _total_key(prefix, identifier)
+    try:
+        r = get_redis()
+        hit = r.get(key)
+        if hit is not None:
+            return int(hit)
+    except RedisError:
+        return compute()
+
+    total = compute()
+    try:
+        r.set(key, total, ex=settings.pagination_total_cache_seconds)
+    except RedisError:
+        pass
+    return total
+
+
+def invalidate_total(prefix: str, identifier: str) -> None:
+    try:
+        get_redis().delete(_total_key(prefix, identifier))
+    except RedisError:
+        pass
@@ -1,32 +1,47 @@
+from datetime import datetime, timezone
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy import func, select, text, tuple_
 
 from app.api.deps import require_admin, get_current_user
+from app.api.pagination import decode_cursor, encode_cursor, keyset_page, next_cursor
+from app.core.auth_cache import CachedUser, invalidate_user
+from app.core.password_pool import password_pool_stats
 from app.db.session import get_db
+from app.models.audit_log import AuditLog
 from app.models.user import User
-from app.schemas.admin import UserAdminOut, UserAdminUpdate
+from app.schemas.admin import AuditLogPage, UserAdminOut, UserAdminPage, UserAdminUpdate
+from app.services.audit import audit_stats
+from app.services.audit_partitions import add_months, as_utc, month_start
+from app.services.index_sync import index_sync_stats
+from app.services.ingest_scheduler import ingest_scheduler_stats
+from app.services.index_warmup import warmup_progress
+from app.services.rag_index import index_cache_stats
+from app.core.config import settings
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
 
-@router.get("/users", response_model=dict, dependencies=[Depends(require_admin)])
-def list_users(limit: int = 50, offset: int = 0, db: Session = Depends(get_db)):
+@router.get("/users", response_model=UserAdminPage, dependencies=[Depends(require_admin)])
+def list_users(limit: int = 50, cursor: str | None = None, include_total: bool = False, db: Session = Depends(get_db)):
     if limit < 1 or limit > 200:
         raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
-    if offset < 0:
-        raise HTTPException(status_code=400, detail="offset must be >= 0")
 
-    users = db.scalars(
-        select(User).order_by(User.created_at.desc()).limit(limit).offset(offset)
-    ).all()
+    users = db.scalars(keyset_page(select(User), User.created_at, User.id, limit, cursor)).all()
+
+    total = None
+    if include_total:
+        # Planner estimate: free to read, accurate to within the last ANALYZE
+        total = db.scalar(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'users'"))
+        if total is None or total < 0:
+            total = db.scalar(select(func.count()).select_from(User)) or 0
 
     return {
-        "items": [UserAdminOut.model_validate(u).model_dump() for u in users],
+        "items": users,
         "limit": limit,
-        "offset": offset,
-        "total": len(users),  # simple for now; can compute exact count later
+        "next_cursor": next_cursor(users, limit),
+        "total": total,
     }
 
 
@@ -35,7 +50,7 @@ def update_user(
     user_id: UUID,
     payload: UserAdminUpdate,
     db: Session = Depends(get_db),
-    admin_user: User = Depends(require_admin),
+    admin_user: CachedUser = Depends(require_admin),
 ):
     user = db.scalar(select(User).where(User.id == user_id))
     if not user:
@@ -55,4 +70,78 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+
+    # Role / is_active changes must apply on the next request, on every worker
+    invalidate_user(user.id)
     return user
+
+
+@router.get("/metrics", response_model=dict, dependencies=[Depends(require_admin)])
+def metrics():
+    # Per-worker numbers: each gunicorn worker reports its own pools
+    return {
+        "password_pool": password_pool_stats(),
+        "audit": audit_stats(),
+        "rag_index_cache": index_cache_stats(),
+        "rag_warmup": warmup_progress(),
+        "rag_index_sync": index_sync_stats(),
+        "rag_ingest": ingest_scheduler_stats(),
+    }
+
+
+@router.get("/audit-logs", response_model=AuditLogPage, dependencies=[Depends(require_admin)])
+def list_audit_logs(
+    actor_user_id: UUID | None = None,
+    event_type: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = 50,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Newest-first audit events with keyset pagination.
+    Walks backwards one calendar month at a time, so each query has constant
+    created_at bounds and the planner touches a single partition.
+    """
+    if limit < 1 or limit > 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+
+    # Query params without an offset arrive naive; they are read as UTC
+    now = datetime.now(timezone.utc)
+    floor = as_utc(since) if since else add_months(month_start(now), -settings.audit_retention_months)
+    upper = as_utc(until) if until else now
+    after_key = None  # (created_at, id) of the last row already returned
+    if cursor:
+        after_key = decode_cursor(cursor)
+        upper = min(upper, after_key[0])
+
+    items: list[AuditLog] = []
+    first = True
+    while len(items) < limit and upper > floor:
+        lower = month_start(upper)
+        if lower == upper:
+            lower = add_months(lower, -1)
+        lower = max(lower, floor)
+
+        stmt = select(AuditLog).where(AuditLog.created_at >= lower)
+        if first:
+            stmt = stmt.where(AuditLog.created_at <= upper)
+            if after_key is not None:
+                # Rows sharing the cursor's timestamp are split by id
+                stmt = stmt.where(tuple_(AuditLog.created_at, AuditLog.id) < after_key)
+        else:
+            stmt = stmt.where(AuditLog.created_at < upper)
+        if actor_user_id is not None:
+            stmt = stmt.where(AuditLog.actor_user_id == actor_user_id)
+        if event_type is not None:
+            stmt = stmt.where(AuditLog.event_type == event_type)
+
+        items.extend(db.scalars(
+            stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit - len(items))
+        ).all())
+        first = False
+        upper = lower
+
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(items) == limit else None
+    return AuditLogPage(items=items, limit=limit, next_cursor=next_cursor)
@@ -2,7 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
-from app.core.security import hash_password, verify_password, create_access_token
+from app.core.password_pool import PasswordPoolSaturated, pool_hash_password, pool_verify_password
+from app.core.security import create_access_token, password_needs_rehash
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import RegisterRequest, LoginRequest, TokenResponse, MeResponse
@@ -15,6 +16,14 @@ from app.services.audit import audit
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 
+def _pool_busy(e: PasswordPoolSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Service busy, try again shortly",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
 @router.post("/register", response_model=MeResponse, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit_ip("register", 3, 60))])
 def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     email = payload.email.lower()
@@ -27,9 +36,14 @@ def register(payload: RegisterRequest, db: Session = Depends(get_db)):
     if len(payload.password) < 10:
         raise HTTPException(status_code=400, detail="Password too short")
 
+    try:
+        password_hash = pool_hash_password(payload.password)
+    except PasswordPoolSaturated as e:
+        raise _pool_busy(e)
+
     user = User(
         email=email,
-        password_hash=hash_password(payload.password),
+        password_hash=password_hash,
         role="user",
         is_active=True,
     )
@@ -46,13 +60,28 @@ def login(payload: LoginRequest, db: Session = Depends(get_db)):
 
     user = db.scalar(select(User).where(User.email == email))
     # Prevent user enumeration: return same error for missing user or wrong password
-    if not user or not user.password_hash or not verify_password(payload.password, user.password_hash):
+    try:
+        valid = bool(user and user.password_hash and pool_verify_password(payload.password, user.password_hash))
+    except PasswordPoolSaturated as e:
+        raise _pool_busy(e)
+    if not valid:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account disabled")
 
-    audit(db, user.id, "auth.login", {"role": user.role})
+    # Argon2 cost settings changed since this hash was made: upgrade it now that
+    # we hold the plaintext. Best effort; a busy pool just retries next login.
+    if password_needs_rehash(user.password_hash):
+        try:
+            user.password_hash = pool_hash_password(payload.password)
+            db.add(user)
+            db.commit()
+        except PasswordPoolSaturated:
+            pass
+
+    # Logins are security-relevant: write them before issuing the token
+    audit(db, user.id, "auth.login", {"role": user.role}, durable=True)
     
     token = create_access_token(subject=str(user.id), role=user.role)
     return TokenResponse(access_token=token, expires_in=15 * 60)
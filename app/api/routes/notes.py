@@ -1,21 +1,68 @@
+import asyncio
+import json
+import logging
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status
+import anyio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import Float, cast, select, func, tuple_
 
 from app.db.session import get_db
 from app.models.user import User
 from app.models.note import Note
-from app.schemas.note import NoteCreate, NoteOut, NoteUpdate
+from app.schemas.note import NoteCreate, NoteOut, NotePage, NoteSearchPage, NoteUpdate
 
 from app.api.deps import get_current_user
+from app.api.pagination import cached_total, decode_rank_cursor, encode_rank_cursor, invalidate_total, keyset_page, next_cursor
 from app.api.rate_limit import rate_limit_user
 
+from app.core.config import settings
 from app.services.audit import audit
+from app.services.ingest_scheduler import index_build_slot, submit_ingest
+from app.services.notes_bulk import copy_notes, iter_notes_ndjson
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
+def index_note_job(note_id: str, user_id: str) -> None:
+    """
+    Runs in BackgroundTasks: apply one note create/update/delete to the user's RAG index as a delta.
+    """
+    from app.db.session import SessionLocal
+    from app.services.rag_index import apply_note_delta
+
+    db = SessionLocal()
+    try:
+        apply_note_delta(db, user_id=user_id, note_id=note_id)
+    except Exception:
+        # Best effort: the next full rebuild picks the note up
+        logger.exception("note index delta failed note_id=%s", note_id)
+    finally:
+        db.close()
+
+
+def reindex_user_job(user_id: str) -> None:
+    """
+    Runs after a bulk import (ingest scheduler or BackgroundTasks): one full rebuild instead of a delta per note.
+    """
+    from app.db.session import SessionLocal
+    from app.services.rag_index import rebuild_index_user
+
+    db = SessionLocal()
+    try:
+        with index_build_slot():
+            rebuild_index_user(db, user_id=user_id)
+    except Exception:
+        logger.exception("index rebuild after import failed user_id=%s", user_id)
+    finally:
+        db.close()
+
+
 ## Day 1 dev user logic is now eliminated. ##
 
 # current_user_EMAIL = "dev@local"
@@ -37,7 +84,12 @@ router = APIRouter(prefix="/notes", tags=["notes"])
 
 
 @router.post("", response_model=NoteOut, status_code=status.HTTP_201_CREATED, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
-def create_note(payload: NoteCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def create_note(
+    payload: NoteCreate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     # Day 1 feature is now gone.
     # current_user = get_or_create_current_user(db) 
     # Now we have get_current_user from Day 2.
@@ -50,37 +102,205 @@ def create_note(payload: NoteCreate, db: Session = Depends(get_db), current_user
     db.add(note)
     db.commit()
     db.refresh(note)
+    invalidate_total("notes", str(current_user.id))
+    background_tasks.add_task(index_note_job, str(note.id), str(current_user.id))
 
     audit(db, current_user.id, "notes.create_note", {"role": current_user.role, "note_title": payload.title})
 
     return note
 
 
-@router.get("", response_model=dict, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
-def list_notes(limit: int = 20, offset: int = 0, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("", response_model=NotePage, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
+def list_notes(
+    limit: int = 20,
+    cursor: str | None = None,
+    include_total: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
     if limit < 1 or limit > 100:
         raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
-    if offset < 0:
-        raise HTTPException(status_code=400, detail="offset must be >= 0")
 
-
-    total = db.scalar(select(func.count()).select_from(Note).where(Note.owner_id == current_user.id)) or 0
     notes = db.scalars(
-        select(Note)
-        .where(Note.owner_id == current_user.id)
-        .order_by(Note.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+        keyset_page(select(Note).where(Note.owner_id == current_user.id), Note.created_at, Note.id, limit, cursor)
     ).all()
 
+    total = None
+    if include_total:
+        total = cached_total(
+            "notes",
+            str(current_user.id),
+            lambda: db.scalar(select(func.count()).select_from(Note).where(Note.owner_id == current_user.id)) or 0,
+        )
+
     return {
-        "items": [NoteOut.model_validate(n).model_dump() for n in notes],
+        # ORM rows go straight to NotePage; FastAPI serializes them to JSON once
+        "items": notes,
         "limit": limit,
-        "offset": offset,
+        "next_cursor": next_cursor(notes, limit),
         "total": total,
     }
 
 
+@router.post("/import", response_model=dict, dependencies=[Depends(rate_limit_user("notes_import", 3, 60))])
+async def import_notes(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Bulk import from an NDJSON body: one {"title": ..., "content": ...} object per line.
+    - The body is read as a stream and written with COPY in bounded batches
+    - Bad lines are skipped and reported; good lines are still imported
+    - Each batch commits on its own: if the import stops early (a line over
+      NOTES_IMPORT_MAX_LINE_BYTES gives 413), earlier batches stay imported,
+      and are audited and reindexed like a complete import
+    """
+    batch: list[tuple[str, str]] = []
+    imported = 0
+    errors: list[dict] = []
+    failed = 0
+    line_no = 0
+    imported_bytes = 0
+
+    async def flush():
+        nonlocal imported, batch
+        if batch:
+            imported += await run_in_threadpool(copy_notes, current_user.id, batch)
+            batch = []
+
+    def parse(raw: bytes):
+        nonlocal failed, imported_bytes
+        if not raw.strip():
+            return
+        try:
+            item = NoteCreate.model_validate(json.loads(raw))
+            if "\x00" in item.title or "\x00" in item.content:
+                raise ValueError("NUL characters are not allowed")
+            batch.append((item.title, item.content))
+            imported_bytes += len(raw)
+        except (ValueError, ValidationError) as e:
+            failed += 1
+            if len(errors) < 100:
+                errors.append({"line": line_no, "error": str(e)[:200]})
+
+    buf = b""
+    aborted = False
+    try:
+        async for part in request.stream():
+            buf += part
+            *lines, buf = buf.split(b"\n")
+            for raw in lines:
+                line_no += 1
+                parse(raw)
+                if len(batch) >= settings.notes_import_batch_size:
+                    await flush()
+            if len(buf) > settings.notes_import_max_line_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"line {line_no + 1} is too long; {imported} notes before it were imported",
+                )
+        line_no += 1
+        parse(buf)
+        await flush()
+    except BaseException:
+        aborted = True
+        raise
+    finally:
+        # Blocking Redis/DB calls go to the threadpool; shielded so a cancelled request
+        # (client gone) still accounts for what it committed
+        with anyio.CancelScope(shield=True):
+            # Batches already committed stay imported even if the request fails: account for them
+            if imported:
+                await run_in_threadpool(invalidate_total, "notes", str(current_user.id))
+                # Queued like a document upload, costed by the imported text
+                queued = submit_ingest(str(current_user.id), imported_bytes, reindex_user_job, str(current_user.id))
+                if not queued and aborted:
+                    # Error responses don't run BackgroundTasks
+                    asyncio.get_running_loop().run_in_executor(None, reindex_user_job, str(current_user.id))
+                elif not queued:
+                    background_tasks.add_task(reindex_user_job, str(current_user.id))
+
+            await run_in_threadpool(
+                audit, db, current_user.id, "notes.import",
+                {"role": current_user.role, "imported": imported, "failed": failed, "aborted": aborted},
+            )
+    return {"imported": imported, "failed": failed, "errors": errors}
+
+
+@router.get("/export", dependencies=[Depends(rate_limit_user("notes_export", 3, 60))])
+def export_notes(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+    """
+    Stream every note of the caller as NDJSON (server-side cursor, constant memory).
+    """
+    audit(db, current_user.id, "notes.export", {"role": current_user.role})
+    return StreamingResponse(
+        iter_notes_ndjson(current_user.id),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="notes.ndjson"'},
+    )
+
+
+# Declared before /{note_id} so "search" is not parsed as a note id
+@router.get("/search", response_model=NoteSearchPage, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
+def search_notes(
+    q: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Ranked full-text search over the caller's notes.
+    - Matching uses the GIN index on (owner_id, search_tsv)
+    - Highlights are generated only for the rows on this page
+    """
+    q = q.strip()
+    if not q or len(q) > 200:
+        raise HTTPException(status_code=400, detail="q must be between 1 and 200 characters")
+    if limit < 1 or limit > 50:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 50")
+
+    tsq = func.websearch_to_tsquery("english", q)
+    matches = (
+        # ts_rank_cd is float4; as float8 the cursor round-trips the exact value it compares against
+        select(Note.id.label("id"), cast(func.ts_rank_cd(Note.search_tsv, tsq), Float(53)).label("rank"))
+        .where(Note.owner_id == current_user.id)
+        .where(Note.search_tsv.op("@@")(tsq))
+        .subquery()
+    )
+    page = select(matches.c.id, matches.c.rank)
+    if cursor:
+        page = page.where(tuple_(matches.c.rank, matches.c.id) < decode_rank_cursor(cursor))
+    page = page.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit).subquery()
+
+    rows = db.execute(
+        select(
+            Note.id,
+            Note.title,
+            Note.created_at,
+            Note.updated_at,
+            page.c.rank,
+            func.ts_headline(
+                "english",
+                Note.content,
+                tsq,
+                "StartSel=[[, StopSel=]], MaxFragments=2, MaxWords=30, MinWords=10",
+            ).label("highlight"),
+        )
+        .join(page, page.c.id == Note.id)
+        .order_by(page.c.rank.desc(), page.c.id.desc())
+    ).all()
+
+    next_cursor_ = encode_rank_cursor(rows[-1].rank, rows[-1].id) if len(rows) == limit else None
+    return {
+        "items": [row._asdict() for row in rows],
+        "limit": limit,
+        "next_cursor": next_cursor_,
+    }
+
+
 @router.get("/{note_id}", response_model=NoteOut, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
 def get_note(note_id: uuid.UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
 
@@ -91,7 +311,13 @@ def get_note(note_id: uuid.UUID, db: Session = Depends(get_db), current_user: Us
 
 
 @router.patch("/{note_id}", response_model=NoteOut, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
-def update_note(note_id: uuid.UUID, payload: NoteUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def update_note(
+    note_id: uuid.UUID,
+    payload: NoteUpdate,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
 
     note = db.scalar(select(Note).where(Note.id == note_id, Note.owner_id == current_user.id))
     if not note:
@@ -105,13 +331,19 @@ def update_note(note_id: uuid.UUID, payload: NoteUpdate, db: Session = Depends(g
     db.add(note)
     db.commit()
     db.refresh(note)
+    background_tasks.add_task(index_note_job, str(note.id), str(current_user.id))
 
     audit(db, current_user.id, "notes.update_note", {"role": current_user.role, "note_title": note.title})
     return note
 
 
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(rate_limit_user("notes", 60, 60))])
-def delete_note(note_id: uuid.UUID, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete_note(
+    note_id: uuid.UUID,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
 
     note = db.scalar(select(Note).where(Note.id == note_id, Note.owner_id == current_user.id))
     if not note:
@@ -119,6 +351,8 @@ def delete_note(note_id: uuid.UUID, db: Session = Depends(get_db), current_user:
 
     db.delete(note)
     db.commit()
+    invalidate_total("notes", str(current_user.id))
+    background_tasks.add_task(index_note_job, str(note_id), str(current_user.id))
 
     audit(db, current_user.id, "notes.delete_note", {"role": current_user.role, "note_title": note.title})
 
@@ -1,84 +1,49 @@
-from fastapi import APIRouter, Depends, File, UploadFile, HTTPException, status
+from fastapi import APIRouter, Depends, File, Request, UploadFile, HTTPException, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_current_user
 from app.db.session import get_db
 from app.models.document import Document
 from app.models.chunk import Chunk
+from app.models.note import Note
 from app.models.user import User
-from app.schemas.rag import RagQueryRequest, RagQueryResponse, RagUploadResponse, RagCitation
-from app.services.rag_index import rebuild_index_user, query_index_user
+from app.schemas.rag import DocumentOut, DocumentPage, RagCitation, RagQueryRequest, RagQueryResponse, RagUploadResponse
+from app.services.answer_gen import get_answer_generator, sse_answer, sse_event
+from app.services.ingest_scheduler import IngestBacklogFull, check_ingest_admission, chunking_slot, index_build_slot, submit_ingest
+from app.services.ingest_status import TERMINAL_STATUSES, ingest_progress, publish_ingest_status, wait_for_ingest, watch_ingest
+from app.services.near_dup import simhash
+from app.services.rag_index import Citation, extract_answer, near_duplicate_chunks, rebuild_index_user, query_index_user
+from app.services.index_warmup import touch_recent_user
 
 from sqlalchemy import select, or_
 from app.services.rag_query_utils import extract_keywords
+from app.services.chunking import chunk_text
+
+import asyncio
+import uuid
 
 from fastapi import BackgroundTasks
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
 from sqlalchemy import func
 from app.api.rate_limit import rate_limit_user
+from app.api.pagination import cached_total, invalidate_total, keyset_page, next_cursor
 
 from app.services.audit import audit
 
 router = APIRouter(prefix="/rag", tags=["rag"])
 
-import re
 
-_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+INGEST_PROGRESS_EVERY = 500
 
-def chunk_text(text: str, target_chars: int = 1800, overlap_sentences: int = 2) -> list[str]:
-    """
-    Paragraph + sentence-aware chunker.
-    - Split by paragraphs
-    - Split long paragraphs into sentences
-    - Accumulate into chunks around target_chars
-    - Overlap a few sentences between chunks
-    """
-    text = text.replace("\r\n", "\n").strip()
-    if not text:
-        return []
-
-    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
-    chunks: list[str] = []
-    buf: list[str] = []
-
-    def flush(b: list[str]):
-        s = " ".join(b).strip()
-        if s:
-            chunks.append(s)
-
-    for p in paragraphs:
-        if len(p) <= target_chars:
-            units = [p]
-        else:
-            units = [s.strip() for s in _SENT_SPLIT.split(p) if s.strip()]
-
-        for u in units:
-            if not buf:
-                buf = [u]
-                continue
-
-            if len(" ".join(buf)) + 1 + len(u) > target_chars:
-                flush(buf)
-                tail = buf[-overlap_sentences:] if overlap_sentences > 0 else []
-                buf = tail + [u]
-            else:
-                buf.append(u)
-
-    flush(buf)
-
-    # Merge tiny trailing fragments into previous chunk
-    merged: list[str] = []
-    for ch in chunks:
-        if merged and len(ch) < 320:
-            merged[-1] = (merged[-1] + " " + ch).strip()
-        else:
-            merged.append(ch)
-
-    return merged
 
 def ingest_document_job(document_id: str, user_id: str, text: str) -> None:
     """
     Runs in BackgroundTasks: chunk -> insert chunks -> build per-user index -> mark ready/failed.
     NOTE: Because BackgroundTasks runs after response, we must create our own DB session.
+    Each phase is published for long-poll/SSE status clients.
     """
     from app.db.session import SessionLocal
     from app.services.rag_index import rebuild_index_user
@@ -94,29 +59,50 @@ def ingest_document_job(document_id: str, user_id: str, text: str) -> None:
         doc.ingest_error = None
         db.add(doc)
         db.commit()
+        publish_ingest_status(document_id, "processing", "chunking")
 
-        chunks = chunk_text(text)
+        with chunking_slot():
+            chunks = chunk_text(text)
         if not chunks:
             doc.status = "failed"
             doc.ingest_error = "No text content found after decoding/chunking."
             db.add(doc)
             db.commit()
+            publish_ingest_status(document_id, "failed", "failed")
             return
 
-        # Insert chunks
+        # Flag near-duplicates (boilerplate, repeated sections) as they are written;
+        # the index build collapses them onto the chunk they repeat
+        with chunking_slot():
+            signatures = [simhash(ch) for ch in chunks]
+        chunk_ids = [str(uuid.uuid4()) for _ in chunks]
+        dup_of = near_duplicate_chunks(str(user_id), chunk_ids, signatures)
+
+        # Insert chunks, flushed in batches so progress can be reported
+        publish_ingest_status(document_id, "processing", "inserting", 0, len(chunks))
         for idx, ch in enumerate(chunks):
+            meta = {"filename": doc.filename, "chunk_index": idx, "char_len": len(ch), "simhash": signatures[idx]}
+            if dup_of[idx] is not None:
+                meta["near_dup_of"] = dup_of[idx]
             db.add(
                 Chunk(
+                    id=uuid.UUID(chunk_ids[idx]),
                     document_id=doc.id,
+                    owner_id=doc.owner_id,
                     chunk_index=idx,
                     text=ch,
-                    metadata={"filename": doc.filename, "chunk_index": idx, "char_len": len(ch)},
+                    meta_data=meta,
                 )
             )
+            if (idx + 1) % INGEST_PROGRESS_EVERY == 0:
+                db.flush()
+                publish_ingest_status(document_id, "processing", "inserting", idx + 1, len(chunks))
         db.commit()
 
         # Build per-user index
-        rebuild_index_user(db, user_id=str(user_id))
+        publish_ingest_status(document_id, "processing", "indexing", len(chunks), len(chunks))
+        with index_build_slot():
+            rebuild_index_user(db, user_id=str(user_id))
 
         # Mark ready
         doc.status = "ready"
@@ -124,6 +110,7 @@ def ingest_document_job(document_id: str, user_id: str, text: str) -> None:
         doc.processed_at = func.now()
         db.add(doc)
         db.commit()
+        publish_ingest_status(document_id, "ready", "done", len(chunks), len(chunks))
 
     except Exception as e:
         # Best effort: record failure
@@ -136,6 +123,7 @@ def ingest_document_job(document_id: str, user_id: str, text: str) -> None:
                 db.commit()
         except Exception:
             pass
+        publish_ingest_status(document_id, "failed", "failed")
     finally:
         db.close()
 
@@ -151,6 +139,16 @@ def upload_document(
     if file.content_type not in ("text/plain", "text/markdown", "application/octet-stream"):
         raise HTTPException(status_code=400, detail="Text uploads only for now")
 
+    # Reject before reading the body when this worker's ingestion backlog is full
+    try:
+        check_ingest_admission(str(current_user.id))
+    except IngestBacklogFull as e:
+        raise HTTPException(
+            status_code=503,
+            detail="ingestion backlog is full, retry later",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     raw = file.file.read()
     try:
         text = raw.decode("utf-8")
@@ -167,9 +165,12 @@ def upload_document(
     db.add(doc)
     db.commit()
     db.refresh(doc)
+    invalidate_total("documents", str(current_user.id))
 
-    # Run ingestion after response returns
-    background_tasks.add_task(ingest_document_job, str(doc.id), str(current_user.id), text)
+    # Queued per tenant and costed by size; BackgroundTasks when the scheduler isn't running
+    publish_ingest_status(doc.id, "processing", "queued")
+    if not submit_ingest(str(current_user.id), len(raw), ingest_document_job, str(doc.id), str(current_user.id), text):
+        background_tasks.add_task(ingest_document_job, str(doc.id), str(current_user.id), text)
 
     audit(db, current_user.id, "rag.upload", {"role": current_user.role, "uploaded_file": file.filename, "file_id": doc.id})
     # Service-grade: num_chunks unknown until finished
@@ -177,127 +178,265 @@ def upload_document(
 
 
 
-@router.post("/query", response_model=RagQueryResponse,
-dependencies=[Depends(rate_limit_user("rag_query", 60, 60))])
-def rag_query(
-    payload: RagQueryRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    
+# Day 4: Confidence gating
+ABS_THRESHOLD = 0.18
+GAP_THRESHOLD = 0.02
+
+NO_PASSAGES_ANSWER = "I couldn't find relevant passages in your uploaded documents."
+ABSTAIN_ANSWER = (
+    "I couldn't find strong support for that in your uploaded documents. "
+    "Try a more specific question or upload a document that explicitly contains the answer."
+)
+
+
+def _retrieve(db: Session, current_user: User, payload: RagQueryRequest) -> list[Citation]:
     keywords = extract_keywords(payload.question, max_terms=6)
 
     candidate_ids: list[str] | None = None
+    candidate_note_ids: list[str] | None = None
     if keywords:
         # Find candidate chunks in DB using simple keyword presence
         # OR together a few ILIKE filters: text ILIKE '%term%'
         conditions = [Chunk.text.ilike(f"%{kw}%") for kw in keywords]
         candidates = db.scalars(
             select(Chunk.id)
-            .join(Document, Chunk.document_id == Document.id)
-            .where(Document.owner_id == current_user.id)
+            .where(Chunk.owner_id == current_user.id)
             .where(or_(*conditions))
             .limit(2000)
         ).all()
         candidate_ids = [str(cid) for cid in candidates] if candidates else None
 
+        # Notes: same idea through the full-text GIN index (keywords are [A-Za-z]{2,}, safe for to_tsquery)
+        note_candidates = db.scalars(
+            select(Note.id)
+            .where(Note.owner_id == current_user.id)
+            .where(Note.search_tsv.op("@@")(func.to_tsquery("english", " | ".join(keywords))))
+            .limit(2000)
+        ).all()
+        candidate_note_ids = [str(nid) for nid in note_candidates] if note_candidates else None
 
     # Day 3: we won’t scope retrieval per-user yet (single-user assumption),
     # but we already store owner_id so Day 5 isolation is easy.
-    citations = query_index_user(db, str(current_user.id), payload.question, top_k=payload.top_k, candidate_chunk_ids=candidate_ids, dedupe=True)
+    return query_index_user(
+        db,
+        str(current_user.id),
+        payload.question,
+        top_k=payload.top_k,
+        candidate_chunk_ids=candidate_ids,
+        dedupe=True,
+        candidate_note_ids=candidate_note_ids,
+    )
 
-    # Basic answer for Day 3: return top citation snippet (extractive baseline).
-    if not citations:
-        return RagQueryResponse(answer="I couldn't find relevant passages in your uploaded documents.", citations=[])
-    
-    # Day 4: Confidence gating
-    ABS_THRESHOLD = 0.18
-    GAP_THRESHOLD = 0.02
 
+def _abstains(citations: list[Citation]) -> bool:
     top = citations[0].score
     second = citations[1].score if len(citations) > 1 else 0.0
+    return (top < ABS_THRESHOLD) or ((top - second) < GAP_THRESHOLD)
 
-    abstain = (top < ABS_THRESHOLD) or ((top - second) < GAP_THRESHOLD)
 
+_citations_adapter = TypeAdapter(list[RagCitation])
+
+
+async def _single_token(text: str):
+    yield text
+
+
+@router.post("/query", response_model=RagQueryResponse,
+dependencies=[Depends(rate_limit_user("rag_query", 60, 60))])
+def rag_query(
+    payload: RagQueryRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    citations = _retrieve(db, current_user, payload)
+
+    # Basic answer for Day 3: return top citation snippet (extractive baseline).
+    if not citations:
+        return RagQueryResponse(answer=NO_PASSAGES_ANSWER, citations=[], abstained=True)
+
+    abstain = _abstains(citations)
     if abstain:
-        answer = (
-            "I couldn't find strong support for that in your uploaded documents. "
-            "Try a more specific question or upload a document that explicitly contains the answer."
-        )
+        answer = ABSTAIN_ANSWER
     else:
-        # Day 4 baseline: extractive answer from best chunk
-        answer = citations[0].snippet
-
-    # Convert to response schema types
-    out_citations = [
-        RagCitation(
-            chunk_id=c.chunk_id,
-            document_id=c.document_id,
-            score=c.score,
-            snippet=c.snippet,
-        )
-        for c in citations
-    ]
+        # Best-matching precomputed sentence from the top chunks; Day 4 baseline as fallback
+        answer = extract_answer(payload.question, citations) or citations[0].snippet
 
     audit(db, current_user.id, "rag.query", {"role": current_user.role, "question_len": len(payload.question), "top_k": payload.top_k})
+    touch_recent_user(current_user.id)
 
-    return RagQueryResponse(answer=answer, citations=out_citations)
+    # Citation dataclasses are validated once, by the response model
+    return {"answer": answer, "citations": citations, "abstained": abstain}
+
+
+@router.post("/query/stream", response_class=StreamingResponse,
+dependencies=[Depends(rate_limit_user("rag_query", 60, 60))])
+def rag_query_stream(
+    payload: RagQueryRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-sent events: citations first, then the answer token by token from the configured generator.
+    Abstentions skip generation and send the fixed answer as a single token.
+    """
+    citations = _retrieve(db, current_user, payload)
+    abstain = not citations or _abstains(citations)
+
+    if not citations:
+        tokens = _single_token(NO_PASSAGES_ANSWER)
+    elif abstain:
+        tokens = _single_token(ABSTAIN_ANSWER)
+    else:
+        # Retrieval and extraction finish here, before the stream starts and the session closes
+        draft = extract_answer(payload.question, citations) or citations[0].snippet
+        tokens = get_answer_generator().stream(payload.question, [c.snippet for c in citations], draft)
+
+    audit(db, current_user.id, "rag.query", {"role": current_user.role, "question_len": len(payload.question), "top_k": payload.top_k, "stream": True})
+    touch_recent_user(current_user.id)
+
+    # Validated first, like the response model does for /query: Citation carries str ids
+    head = {
+        "citations": _citations_adapter.dump_python(_citations_adapter.validate_python(citations, from_attributes=True), mode="json"),
+        "abstained": abstain,
+    }
+    return StreamingResponse(
+        sse_answer(head, tokens, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # Day 5: list, get, and delete documents belonging to a user
 
-@router.get("/documents", response_model=dict)
+@router.get("/documents", response_model=DocumentPage)
 def list_documents(
     limit: int = 50,
-    offset: int = 0,
+    cursor: str | None = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
+    if limit < 1 or limit > 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
+
     docs = db.scalars(
-        select(Document)
-        .where(Document.owner_id == current_user.id)
-        .order_by(Document.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+        keyset_page(select(Document).where(Document.owner_id == current_user.id), Document.created_at, Document.id, limit, cursor)
     ).all()
 
+    total = None
+    if include_total:
+        total = cached_total(
+            "documents",
+            str(current_user.id),
+            lambda: db.scalar(select(func.count()).select_from(Document).where(Document.owner_id == current_user.id)) or 0,
+        )
+
     return {
-        "items": [
-            {
-                "id": str(d.id),
-                "filename": d.filename,
-                "status": d.status,
-                "num_chunks": d.num_chunks,
-                "created_at": d.created_at,
-                "processed_at": d.processed_at,
-                "ingest_error": d.ingest_error,
-            }
-            for d in docs
-        ],
+        "items": docs,
         "limit": limit,
-        "offset": offset,
-        "total": len(docs),
+        "next_cursor": next_cursor(docs, limit),
+        "total": total,
     }
 
-@router.get("/documents/{document_id}", response_model=dict)
-def get_document(
-    document_id: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
+def _owned_document(db: Session, document_id: str, current_user: User) -> Document:
     doc = db.get(Document, document_id)
     if not doc or str(doc.owner_id) != str(current_user.id):
         raise HTTPException(status_code=404, detail="document not found")
+    return doc
 
-    return {
-        "id": str(doc.id),
-        "filename": doc.filename,
-        "status": doc.status,
-        "num_chunks": doc.num_chunks,
-        "created_at": doc.created_at,
-        "processed_at": doc.processed_at,
-        "ingest_error": doc.ingest_error,
-    }
+
+def _document_status(doc: Document) -> dict:
+    out = DocumentOut.model_validate(doc).model_dump(mode="json")
+    progress = ingest_progress(doc.id) if doc.status == "processing" else None
+    if progress:
+        out.update(phase=progress["phase"], chunks_inserted=progress["chunks_inserted"], chunks_total=progress["chunks_total"])
+    return out
+
+
+def _read_document_status(document_id: str) -> dict | None:
+    """
+    Fresh status read on its own session, for streams that outlive the request's session.
+    """
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        doc = db.get(Document, document_id)
+        return _document_status(doc) if doc else None
+
+
+@router.get("/documents/{document_id}", response_model=DocumentOut)
+async def get_document(
+    document_id: str,
+    wait: float = 0,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    wait > 0 long-polls: a processing document is returned once it is ready/failed,
+    or after wait seconds (capped at RAG_INGEST_WAIT_MAX_SECONDS) with its current progress.
+    """
+    if wait < 0:
+        raise HTTPException(status_code=400, detail="wait must be >= 0")
+    if wait == 0:
+        return _document_status(await run_in_threadpool(_owned_document, db, document_id, current_user))
+
+    # Subscribe before reading, so a status change in between isn't missed
+    with watch_ingest(document_id) as events:
+        doc = await run_in_threadpool(_owned_document, db, document_id, current_user)
+        if doc.status in TERMINAL_STATUSES:
+            return _document_status(doc)
+        # Give the connection back to the pool while waiting
+        await run_in_threadpool(db.close)
+        await wait_for_ingest(events, min(wait, settings.rag_ingest_wait_max_seconds))
+
+    doc = await run_in_threadpool(_owned_document, db, document_id, current_user)
+    return _document_status(doc)
+
+
+@router.get("/documents/{document_id}/events", response_class=StreamingResponse)
+async def document_events(
+    document_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Server-sent "status" events (DocumentOut plus progress) until the document is ready/failed.
+    """
+    await run_in_threadpool(_owned_document, db, document_id, current_user)
+    await run_in_threadpool(db.close)
+
+    async def stream():
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.rag_ingest_stream_max_seconds
+        with watch_ingest(document_id) as events:
+            # Read after subscribing, so a status change in between isn't missed
+            current = await run_in_threadpool(_read_document_status, document_id)
+            while current is not None:
+                yield sse_event("status", current)
+                if current["status"] in TERMINAL_STATUSES:
+                    return
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return
+                    try:
+                        event = await asyncio.wait_for(events.get(), min(remaining, 15.0))
+                        break
+                    except TimeoutError:
+                        # Keeps proxies from closing an idle stream
+                        yield ": keepalive\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    # Final num_chunks / ingest_error come from the row
+                    current = await run_in_threadpool(_read_document_status, document_id)
+                else:
+                    current = {**current, "phase": event["phase"], "chunks_inserted": event["chunks_inserted"], "chunks_total": event["chunks_total"]}
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 from app.services.rag_index import rebuild_index_user
 
@@ -316,6 +455,7 @@ def delete_document(
 
     db.delete(doc)
     db.commit()
+    invalidate_total("documents", str(current_user.id))
 
     rebuild_index_user(db, user_id=str(current_user.id))
 
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.db.session import get_db
 from app.core.rate_limiter import get_redis  # adjust if your project names differ
+from app.services.index_warmup import warmup_progress
 
 router = APIRouter(tags=["health"])
 
 
 @router.get("/ready")
-def ready(db: Session = Depends(get_db)):
+def ready(warm: float | None = None, db: Session = Depends(get_db)):
+    """
+    warm=0.8 also requires 80% of the RAG index warm-up to be done (503 until then),
+    so a load balancer can hold traffic off a freshly started worker.
+    """
     # DB check
     db.execute(text("SELECT 1"))
 
@@ -17,4 +22,10 @@ def ready(db: Session = Depends(get_db)):
     r = get_redis()
     r.ping()
 
-    return {"status": "ready"}
+    if warm is None:
+        return {"status": "ready"}
+
+    progress = warmup_progress()
+    if progress["ratio"] < warm:
+        raise HTTPException(status_code=503, detail={"status": "warming", "warmup": progress})
+    return {"status": "ready", "warmup": progress}
@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pubsub import publish, register_handler
+
+USER_INVALIDATE_CHANNEL = "auth:user-invalidate"
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    The subset of a User row that request handlers read from current_user.
+    Detached from any Session, so it is safe to share between requests.
+    """
+    id: uuid.UUID
+    email: str
+    role: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user) -> "CachedUser":
+        return cls(id=user.id, email=user.email, role=user.role, is_active=user.is_active, created_at=user.created_at)
+
+
+# Verified JWT claims, keyed by the raw token. Never outlives the token's exp.
+_token_cache = TTLCache(settings.auth_token_cache_size, settings.auth_token_cache_ttl_seconds)
+
+# Per-worker user rows, keyed by str(user_id).
+_user_cache = TTLCache(settings.auth_user_cache_size, settings.auth_user_cache_ttl_seconds)
+
+# Bumped on every invalidation: a row read before one must not be cached after it
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_cached_claims(token: str) -> dict[str, Any] | None:
+    return _token_cache.get(token)
+
+
+def cache_claims(token: str, payload: dict[str, Any]) -> None:
+    exp = payload.get("exp")
+    if exp is None:
+        return
+    remaining = float(exp) - time.time()
+    if remaining <= 0:
+        return
+    _token_cache.set(token, payload, expires_at=time.monotonic() + remaining)
+
+
+def get_cached_user(user_id: str) -> CachedUser | None:
+    return _user_cache.get(str(user_id))
+
+
+def user_cache_generation() -> int:
+    """
+    Take before reading a user row; pass to cache_user.
+    """
+    return _generation
+
+
+def cache_user(user, generation: int) -> CachedUser:
+    """
+    Cache the row unless an invalidation happened since generation was taken
+    (the row may predate an admin's change); the row is returned either way.
+    """
+    cached = CachedUser.from_user(user)
+    with _generation_lock:
+        if generation == _generation:
+            _user_cache.set(str(cached.id), cached)
+    return cached
+
+
+def _drop_user(user_id: str) -> None:
+    global _generation
+    with _generation_lock:
+        _generation += 1
+        _user_cache.pop(user_id)
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Drop the user locally and tell every other worker to do the same.
+    """
+    _drop_user(str(user_id))
+    publish(USER_INVALIDATE_CHANNEL, str(user_id))
+
+
+def _on_invalidate(user_id: str) -> None:
+    _drop_user(user_id)
+
+
+register_handler(USER_INVALIDATE_CHANNEL, _on_invalidate)
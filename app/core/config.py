@@ -16,4 +16,75 @@ class Settings(BaseSettings):
     # Day 2: Rate limiting
     redis_url: str
 
+    # Auth fast path: verified token claims and user rows cached per worker
+    auth_token_cache_size: int = 10_000
+    auth_token_cache_ttl_seconds: float = 60.0
+    auth_user_cache_size: int = 10_000
+    auth_user_cache_ttl_seconds: float = 30.0
+
+    # Password hashing: Argon2id cost and the dedicated hashing pool
+    argon2_time_cost: int = 3
+    argon2_memory_cost_kib: int = 65536
+    argon2_parallelism: int = 4
+    password_pool_workers: int = 2
+    password_pool_queue_size: int = 16
+    password_pool_retry_after_seconds: int = 2
+
+    # Audit log pipeline: "buffered" batches events in the background, "sync" commits each one inline
+    audit_mode: str = "buffered"
+    audit_flush_interval_seconds: float = 1.0
+    audit_batch_size: int = 500
+    audit_buffer_size: int = 10_000
+    # audit_logs is partitioned by month; old partitions are dropped after the retention window
+    audit_partition_months_ahead: int = 3
+    audit_retention_months: int = 12
+    audit_maintenance_interval_seconds: float = 3600.0
+
+    # List endpoints: optional totals are cached this long
+    pagination_total_cache_seconds: int = 30
+
+    # RAG: note edits are indexed as deltas; past this many rows the user's index is rebuilt
+    rag_delta_max_rows: int = 2000
+    # Per-worker cache of loaded indexes, and how many recently active users to preload at start
+    rag_index_cache_max_mb: int = 512
+    rag_warmup_users: int = 50
+    # Where index artifacts live: local (data/), postgres (rag_index_artifacts) or s3.
+    # Remote stores keep a read-through copy in rag_index_cache_dir.
+    rag_index_store: str = "local"
+    rag_index_cache_dir: str = "data/index-cache"
+    rag_index_s3_bucket: str = ""
+    rag_index_s3_prefix: str = "rag-indexes/"
+    rag_index_s3_endpoint_url: str | None = None
+    # How long a request waits for another one rebuilding a missing/corrupt index
+    rag_rebuild_wait_seconds: float = 30.0
+    # Lease on the cross-worker rebuild lock in Redis; a crashed holder frees it after this
+    rag_rebuild_lock_seconds: float = 300.0
+    # Cached indexes are re-checked against the store this often, to catch missed pub/sub events
+    rag_index_reconcile_seconds: float = 60.0
+    # Users with at least 2x this many rows are scored in parallel row shards
+    rag_shard_min_rows: int = 50_000
+    rag_shard_workers: int = 4
+    # Bulk reindex (python -m app.services.reindex): process pool size and rebuild start rate
+    rag_reindex_workers: int = 2
+    rag_reindex_users_per_second: float = 5.0
+    # Streaming answers (/rag/query/stream): generator backend, and the stub's per-token delay
+    rag_generator: str = "stub"
+    rag_stub_token_delay_seconds: float = 0.0
+    # Document status push: longest ?wait= long-poll, and how long an /events stream may stay open
+    rag_ingest_wait_max_seconds: float = 60.0
+    rag_ingest_stream_max_seconds: float = 600.0
+    # Ingestion scheduler: worker threads, deficit round robin credit per tenant turn (text bytes),
+    # per-worker caps on concurrent chunking / index builds, and backlog limits before uploads get 503
+    rag_ingest_workers: int = 4
+    rag_ingest_quantum_bytes: int = 256 * 1024
+    rag_ingest_max_chunking: int = 2
+    rag_ingest_max_index_builds: int = 2
+    rag_ingest_max_backlog: int = 200
+    rag_ingest_max_tenant_backlog: int = 20
+
+    # Notes NDJSON bulk import/export
+    notes_import_batch_size: int = 1000
+    notes_import_max_line_bytes: int = 1_000_000
+    notes_export_batch_size: int = 1000
+
 settings = Settings()
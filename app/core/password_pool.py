@@ -0,0 +1,64 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.security import hash_password, verify_password
+
+# Argon2 runs in C and releases the GIL, so a small thread pool caps CPU use
+# without the cost of a process pool. Request threads only wait on the result.
+_executor = ThreadPoolExecutor(max_workers=settings.password_pool_workers, thread_name_prefix="argon2")
+
+# Running + queued jobs. When every slot is taken we reject instead of queueing.
+_slots = threading.BoundedSemaphore(settings.password_pool_workers + settings.password_pool_queue_size)
+
+_lock = threading.Lock()
+_stats = {"in_flight": 0, "completed": 0, "rejected": 0, "total_wait_ms": 0.0}
+
+
+class PasswordPoolSaturated(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__("password hashing pool is saturated")
+        self.retry_after = retry_after
+
+
+def _run(fn, *args):
+    if not _slots.acquire(blocking=False):
+        with _lock:
+            _stats["rejected"] += 1
+        raise PasswordPoolSaturated(settings.password_pool_retry_after_seconds)
+
+    with _lock:
+        _stats["in_flight"] += 1
+    start = time.perf_counter()
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+        with _lock:
+            _stats["in_flight"] -= 1
+            _stats["completed"] += 1
+            _stats["total_wait_ms"] += (time.perf_counter() - start) * 1000
+
+
+def pool_hash_password(password: str) -> str:
+    return _run(hash_password, password)
+
+
+def pool_verify_password(password: str, password_hash: str) -> bool:
+    return _run(verify_password, password, password_hash)
+
+
+def password_pool_stats() -> dict:
+    with _lock:
+        in_flight = _stats["in_flight"]
+        completed = _stats["completed"]
+        return {
+            "workers": settings.password_pool_workers,
+            "capacity": settings.password_pool_workers + settings.password_pool_queue_size,
+            "in_flight": in_flight,
+            "queue_depth": max(0, in_flight - settings.password_pool_workers),
+            "completed": completed,
+            "rejected": _stats["rejected"],
+            "avg_latency_ms": round(_stats["total_wait_ms"] / completed, 2) if completed else 0.0,
+        }
@@ -0,0 +1,73 @@
+import logging
+import threading
+from typing import Callable
+
+from redis.exceptions import RedisError
+
+from app.core.rate_limiter import get_redis
+
+logger = logging.getLogger(__name__)
+
+# channel -> handlers. Modules register at import time; the listener thread
+# (started from the app lifespan) dispatches every message it receives.
+_handlers: dict[str, list[Callable[[str], None]]] = {}
+
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def register_handler(channel: str, handler: Callable[[str], None]) -> None:
+    _handlers.setdefault(channel, []).append(handler)
+
+
+def publish(channel: str, message: str) -> None:
+    """
+    Best effort: if Redis is down, other workers fall back to their cache TTLs.
+    """
+    try:
+        get_redis().publish(channel, message)
+    except RedisError:
+        logger.warning("pubsub publish failed channel=%s", channel)
+
+
+def _dispatch(channel: str, data: str) -> None:
+    for handler in _handlers.get(channel, []):
+        try:
+            handler(data)
+        except Exception:
+            logger.exception("pubsub handler failed channel=%s", channel)
+
+
+def _listen() -> None:
+    backoff = 1.0
+    while not _stop.is_set():
+        try:
+            p = get_redis().pubsub(ignore_subscribe_messages=True)
+            p.subscribe(*_handlers.keys())
+            backoff = 1.0
+            while not _stop.is_set():
+                msg = p.get_message(timeout=1.0)
+                if msg and msg.get("type") == "message":
+                    _dispatch(msg["channel"], msg["data"])
+            p.close()
+        except RedisError:
+            logger.warning("pubsub listener disconnected; retrying in %.0fs", backoff)
+            _stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+
+def start_listener() -> None:
+    global _thread
+    if _thread is not None or not _handlers:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_listen, name="pubsub-listener", daemon=True)
+    _thread.start()
+
+
+def stop_listener() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
@@ -8,8 +8,13 @@ from jose import jwt, JWTError
 from app.core.config import settings
 
 
-# Argon2id is the default in argon2-cffi PasswordHasher (good default)
-_pwd_hasher = PasswordHasher()
+# Argon2id is the default in argon2-cffi PasswordHasher (good default).
+# Changing the cost settings rehashes existing passwords on their next login.
+_pwd_hasher = PasswordHasher(
+    time_cost=settings.argon2_time_cost,
+    memory_cost=settings.argon2_memory_cost_kib,
+    parallelism=settings.argon2_parallelism,
+)
 
 
 def hash_password(password: str) -> str:
@@ -23,6 +28,10 @@ def verify_password(password: str, password_hash: str) -> bool:
         return False
 
 
+def password_needs_rehash(password_hash: str) -> bool:
+    return _pwd_hasher.check_needs_rehash(password_hash)
+
+
 def create_access_token(*, subject: str, role: str) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=settings.access_token_expire_minutes)
@@ -1,5 +1,12 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.core.config import settings
+from app.core.pubsub import start_listener, stop_listener
+from app.services.audit import start_audit_writer, stop_audit_writer
+from app.services.index_warmup import start_index_warmup, stop_index_warmup
+from app.services.index_sync import start_index_sync, stop_index_sync
+from app.services.ingest_scheduler import start_ingest_scheduler, stop_ingest_scheduler
 from app.api.routes import health_router, notes_router, auth_router, admin_router, rag_router, ready_router
 
 from app.core.logging import setup_logging
@@ -9,13 +16,34 @@ from app.middleware.security_headers import SecurityHeadersMiddleware
 
 setup_logging(getattr(settings, "log_level", "INFO"))
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Cross-worker cache invalidation (e.g. admin user updates)
+    start_listener()
+    start_audit_writer()
+    # Preload hot users' RAG indexes in the background; /v1/ready?warm= reports progress
+    start_index_warmup()
+    # Periodic check of cached indexes; pub/sub evictions ride on the listener above
+    start_index_sync()
+    # Uploads and import rebuilds run here, fairly across tenants
+    start_ingest_scheduler()
+    yield
+    stop_ingest_scheduler()
+    stop_index_sync()
+    stop_index_warmup()
+    # Flush buffered audit events before the worker exits
+    stop_audit_writer()
+    stop_listener()
+
+
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
+    lifespan=lifespan,
     openapi_url="/openapi.json",
     swagger_ui_parameters={"useLocalAssets": True},
 )
-print("enabled:", {"useLocalAssets": True})
 
 # For audit
 app.add_middleware(RequestIDMiddleware)
@@ -1,14 +1,37 @@
 import uuid
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+_HEADER = b"x-request-id"
 
-class RequestIDMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        rid = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-        request.state.request_id = rid
 
-        response: Response = await call_next(request)
-        response.headers["X-Request-ID"] = rid
-        return response
+class RequestIDMiddleware:
+    """
+    Pure ASGI: no per-request task or body re-streaming, so StreamingResponse is untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rid = None
+        for key, value in scope["headers"]:
+            if key == _HEADER:
+                rid = value.decode("latin-1")
+                break
+        rid = rid or str(uuid.uuid4())
+        # Same storage Request.state uses, so request.state.request_id keeps working
+        scope.setdefault("state", {})["request_id"] = rid
+        rid_bytes = rid.encode("latin-1")
+
+        async def send_with_id(message: Message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != _HEADER]
+                headers.append((_HEADER, rid_bytes))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_id)
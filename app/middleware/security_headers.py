@@ -1,27 +1,46 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-
-
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        path = request.url.path
-
-        # Swagger / ReDoc need JS/CSS; FastAPI default uses jsdelivr + fastapi favicon
-        if path.startswith("/docs") or path.startswith("/openapi.json") or path.startswith("/redoc"):
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; "
-                "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-                "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
-                "img-src 'self' data: https://fastapi.tiangolo.com; "
-                "connect-src 'self' https://cdn.jsdelivr.net; "
-                "frame-ancestors 'none';"
-            )
-        else:
-            # Lock down the API surface hard
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'none'; "
-                "frame-ancestors 'none';"
-            )
-
-        return response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_CSP = b"content-security-policy"
+
+# Swagger / ReDoc need JS/CSS; FastAPI default uses jsdelivr + fastapi favicon
+_DOCS_CSP = (
+    b"default-src 'self'; "
+    b"style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+    b"script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; "
+    b"img-src 'self' data: https://fastapi.tiangolo.com; "
+    b"connect-src 'self' https://cdn.jsdelivr.net; "
+    b"frame-ancestors 'none';"
+)
+
+# Lock down the API surface hard
+_API_CSP = (
+    b"default-src 'none'; "
+    b"frame-ancestors 'none';"
+)
+
+_DOCS_PREFIXES = ("/docs", "/openapi.json", "/redoc")
+
+
+class SecurityHeadersMiddleware:
+    """
+    Pure ASGI: sets the CSP header on http.response.start from precomputed bytes.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        csp = _DOCS_CSP if scope["path"].startswith(_DOCS_PREFIXES) else _API_CSP
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != _CSP]
+                headers.append((_CSP, csp))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -3,5 +3,6 @@ from app.models.note import Note
 from app.models.document import Document
 from app.models.chunk import Chunk
 from app.models.audit_log import AuditLog
+from app.models.index_artifact import IndexArtifact
 
-__all__ = ["User", "Note", "Document", "Chunk", "AuditLog"]
+__all__ = ["User", "Note", "Document", "Chunk", "AuditLog", "IndexArtifact"]
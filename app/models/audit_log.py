@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import DateTime, func, String, ForeignKey
+from sqlalchemy import DateTime, func, String, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -8,6 +8,8 @@ from app.db.base import Base
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # Monthly range partitions on created_at, managed by app.services.audit_partitions
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -15,10 +17,15 @@ class AuditLog(Base):
         UUID(as_uuid=True),
         ForeignKey("users.id", ondelete="SET NULL"),
         nullable=True,
-        index=True,
     )
 
-    event_type: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    event_type: Mapped[str] = mapped_column(String(50), nullable=False)
     details: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
 
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+    # Part of the primary key because Postgres requires the partition key in it
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), primary_key=True)
+
+
+# Keyset reads: newest first per actor / per event type, within one partition
+Index("ix_audit_logs_actor_user_id_created_at", AuditLog.actor_user_id, AuditLog.created_at.desc(), AuditLog.id.desc())
+Index("ix_audit_logs_event_type_created_at", AuditLog.event_type, AuditLog.created_at.desc(), AuditLog.id.desc())
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Integer, String, Text, DateTime, func, ForeignKey
+from sqlalchemy import Index, Integer, String, Text, DateTime, func, ForeignKey
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -8,6 +8,11 @@ from app.db.base import Base
 
 class Chunk(Base):
     __tablename__ = "chunks"
+    __table_args__ = (
+        # Per-user scans (index rebuild, candidate search) read one owner's range in order
+        Index("ix_chunks_owner_id_created_at", "owner_id", "created_at"),
+        Index("ix_chunks_document_id_chunk_index", "document_id", "chunk_index"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
@@ -15,7 +20,13 @@ class Chunk(Base):
         UUID(as_uuid=True),
         ForeignKey("documents.id", ondelete="CASCADE"),
         nullable=False,
-        index=True,
+    )
+
+    # Copy of documents.owner_id, so per-user queries skip the join; NULL along with it
+    owner_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="SET NULL", name="fk_chunks_owner_id_users"),
+        nullable=True,
     )
 
     chunk_index: Mapped[int] = mapped_column(Integer, nullable=False)
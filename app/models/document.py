@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import String, DateTime, func, ForeignKey
+from sqlalchemy import String, DateTime, func, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import Integer, Text
@@ -31,3 +31,6 @@ class Document(Base):
     ingest_error: Mapped[str | None] = mapped_column(Text, nullable=True)
     processed_at: Mapped[DateTime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
+
+# Keyset pagination: newest documents first per owner
+Index("ix_documents_owner_id_created_at_id", Document.owner_id, Document.created_at.desc(), Document.id.desc())
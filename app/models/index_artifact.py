@@ -0,0 +1,19 @@
+from sqlalchemy import DateTime, LargeBinary, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class IndexArtifact(Base):
+    """
+    Serialized RAG index artifacts when RAG_INDEX_STORE=postgres (see app.services.index_store).
+    """
+    __tablename__ = "rag_index_artifacts"
+
+    name: Mapped[str] = mapped_column(String(255), primary_key=True)
+    data: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+
+    # sha256 of data; readers compare it with their local copy before downloading
+    version: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    updated_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
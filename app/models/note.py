@@ -1,6 +1,6 @@
 import uuid
-from sqlalchemy import DateTime, ForeignKey, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Computed, DateTime, ForeignKey, Index, String, Text, func
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
 from app.db.base import Base
@@ -28,4 +28,24 @@ class Note(Base):
         onupdate=func.now(),
     )
 
+    # Full-text search document; title terms rank above content terms.
+    # Deferred: only the search endpoint reads it.
+    search_tsv: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+        deferred=True,
+    )
+
     owner = relationship("User", back_populates="notes")
+
+
+# Keyset pagination: newest notes first per owner
+Index("ix_notes_owner_id_created_at_id", Note.owner_id, Note.created_at.desc(), Note.id.desc())
+
+# Full-text search scoped to one owner (needs the btree_gin extension)
+Index("ix_notes_owner_id_search_tsv", Note.owner_id, Note.search_tsv, postgresql_using="gin")
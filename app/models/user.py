@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Boolean, DateTime, String, func
+from sqlalchemy import Boolean, DateTime, Index, String, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -22,3 +22,7 @@ class User(Base):
     created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     notes = relationship("Note", back_populates="owner", cascade="all, delete-orphan")
+
+
+# Keyset pagination for the admin user list
+Index("ix_users_created_at_id", User.created_at.desc(), User.id.desc())
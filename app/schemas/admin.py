@@ -15,7 +15,31 @@ class UserAdminOut(BaseModel):
         from_attributes = True
 
 
+class UserAdminPage(BaseModel):
+    items: list[UserAdminOut]
+    limit: int
+    next_cursor: str | None
+    total: int | None = None
+
+
 class UserAdminUpdate(BaseModel):
     role: str | None = Field(default=None, pattern="^(user|admin)$")
     is_active: bool | None = None
     email: EmailStr | None = None
+
+
+class AuditLogOut(BaseModel):
+    id: UUID
+    actor_user_id: UUID | None
+    event_type: str
+    details: dict | None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AuditLogPage(BaseModel):
+    items: list[AuditLogOut]
+    limit: int
+    next_cursor: str | None
@@ -23,3 +23,26 @@ class NoteOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class NotePage(BaseModel):
+    items: list[NoteOut]
+    limit: int
+    next_cursor: str | None
+    total: int | None = None
+
+
+class NoteSearchHit(BaseModel):
+    id: UUID
+    title: str
+    rank: float
+    # Matching fragments; matched terms are wrapped in [[ ]]
+    highlight: str
+    created_at: datetime
+    updated_at: datetime | None
+
+
+class NoteSearchPage(BaseModel):
+    items: list[NoteSearchHit]
+    limit: int
+    next_cursor: str | None
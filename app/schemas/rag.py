@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel, Field
 from uuid import UUID
 
@@ -8,18 +9,50 @@ class RagQueryRequest(BaseModel):
 
 
 class RagCitation(BaseModel):
-    chunk_id: UUID
-    document_id: UUID
+    # Document citations set chunk_id/document_id, note citations set note_id
+    chunk_id: UUID | None
+    document_id: UUID | None
     score: float
     snippet: str
+    note_id: UUID | None = None
+
+    # Built straight from rag_index.Citation
+    class Config:
+        from_attributes = True
 
 
 class RagQueryResponse(BaseModel):
     answer: str
     citations: list[RagCitation]
+    # True when the confidence gate withheld an extractive answer
+    abstained: bool = False
 
 
 class RagUploadResponse(BaseModel):
     document_id: UUID
     num_chunks: int
     filename: str
+
+
+class DocumentOut(BaseModel):
+    id: UUID
+    filename: str
+    status: str
+    num_chunks: int | None
+    created_at: datetime
+    processed_at: datetime | None
+    ingest_error: str | None
+    # Live ingestion progress while status is "processing" (single-document reads only)
+    phase: str | None = None
+    chunks_inserted: int | None = None
+    chunks_total: int | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class DocumentPage(BaseModel):
+    items: list[DocumentOut]
+    limit: int
+    next_cursor: str | None
+    total: int | None = None
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Awaitable, Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How often a slow generator is interrupted to check whether the client is still there
+_DISCONNECT_POLL_SECONDS = 0.25
+
+
+class AnswerGenerator(ABC):
+    """
+    Streams an answer grounded in retrieved passages, as text deltas.
+    - draft is the extractive answer, for backends that only rephrase it
+    - closing the iterator must stop generation (and release any upstream request)
+    - blocking clients should hop to a thread per token (anyio.to_thread.run_sync)
+    """
+
+    @abstractmethod
+    def stream(self, question: str, passages: list[str], draft: str | None) -> AsyncIterator[str]:
+        ...
+
+
+class StubGenerator(AnswerGenerator):
+    """
+    Deterministic local backend: replays the draft (or the top passage) word by word.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def stream(self, question: str, passages: list[str], draft: str | None) -> AsyncIterator[str]:
+        text = draft or (passages[0] if passages else "")
+        words = text.split()
+        for i, word in enumerate(words):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield word if i == len(words) - 1 else word + " "
+
+
+_generator: AnswerGenerator | None = None
+
+
+def get_answer_generator() -> AnswerGenerator:
+    """
+    The backend selected by RAG_GENERATOR.
+    """
+    global _generator
+    if _generator is None:
+        kind = settings.rag_generator
+        if kind == "stub":
+            _generator = StubGenerator(settings.rag_stub_token_delay_seconds)
+        else:
+            raise RuntimeError(f"unknown RAG_GENERATOR: {kind}")
+    return _generator
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def sse_answer(
+    head: dict,
+    tokens: AsyncIterator[str],
+    is_disconnected: Callable[[], Awaitable[bool]],
+) -> AsyncIterator[str]:
+    """
+    SSE body: a "citations" event right away, then one "token" event per delta and a final "done".
+    Generation is cancelled as soon as the client goes away, even between slow tokens.
+    A failing backend ends the stream with an "error" event.
+    """
+    yield sse_event("citations", head)
+    try:
+        while True:
+            step = asyncio.ensure_future(anext(tokens))
+            try:
+                while not step.done():
+                    await asyncio.wait({step}, timeout=_DISCONNECT_POLL_SECONDS)
+                    if not step.done() and await is_disconnected():
+                        return
+                text = step.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                logger.exception("answer generation failed")
+                yield sse_event("error", {"detail": "answer generation failed"})
+                return
+            finally:
+                # The generator can't be closed while a cancelled step is still unwinding in it
+                step.cancel()
+                await asyncio.wait({step})
+            yield sse_event("token", {"text": text})
+        yield sse_event("done", {"abstained": head["abstained"]})
+    finally:
+        await tokens.aclose()
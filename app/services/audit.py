@@ -1,6 +1,170 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+
+from app.core.config import settings
 from app.models.audit_log import AuditLog
 
-def audit(db: Session, actor_user_id, event_type: str, details: dict | None = None) -> None:
-    db.add(AuditLog(actor_user_id=actor_user_id, event_type=event_type, details=details))
+logger = logging.getLogger(__name__)
+
+# Events waiting for the background flusher. Bounded by settings.audit_buffer_size;
+# when full, audit() writes inline instead of dropping events.
+_buffer: deque[dict] = deque()
+_lock = threading.Lock()
+_wake = threading.Event()
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+_stats = {"buffered": 0, "flushed": 0, "sync_writes": 0, "failed_batches": 0, "dropped": 0}
+
+
+def _jsonable(details: dict | None) -> dict | None:
+    # Callers pass UUIDs etc.; normalise now so one bad value can't fail a whole batch.
+    if details is None:
+        return None
+    return json.loads(json.dumps(details, default=str))
+
+
+def audit(db: Session, actor_user_id, event_type: str, details: dict | None = None, durable: bool = False) -> None:
+    """
+    Record an audit event.
+    By default the event is buffered and written by the background flusher.
+    durable=True (or AUDIT_MODE=sync) commits it on the caller's session before returning.
+    """
+    event = {
+        "id": uuid.uuid4(),
+        "actor_user_id": actor_user_id,
+        "event_type": event_type,
+        "details": _jsonable(details),
+        "created_at": datetime.now(timezone.utc),
+    }
+
+    if not durable and settings.audit_mode != "sync" and _thread is not None:
+        with _lock:
+            if len(_buffer) < settings.audit_buffer_size:
+                _buffer.append(event)
+                _stats["buffered"] += 1
+                if len(_buffer) >= settings.audit_batch_size:
+                    _wake.set()
+                return
+
+    db.add(AuditLog(**event))
     db.commit()
+    with _lock:
+        _stats["sync_writes"] += 1
+
+
+def _insert(rows: list[dict]) -> None:
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        # Executemany of an ORM insert -> multi-row INSERT ... VALUES batches
+        db.execute(insert(AuditLog), rows)
+        db.commit()
+
+
+def _write_batch(batch: list[dict]) -> bool:
+    """
+    Returns False if nothing could be written (DB unavailable) so the caller can retry later.
+    """
+    try:
+        _insert(batch)
+        with _lock:
+            _stats["flushed"] += len(batch)
+        return True
+    except Exception:
+        logger.exception("audit batch insert failed size=%d", len(batch))
+
+    # Isolate bad rows: if some rows go through, drop only the ones that fail.
+    written, failed = 0, []
+    for row in batch:
+        try:
+            _insert([row])
+            written += 1
+        except Exception:
+            failed.append(row)
+
+    if written == 0:
+        return False
+    for row in failed:
+        logger.error("audit event dropped event_type=%s id=%s", row["event_type"], row["id"])
+    with _lock:
+        _stats["dropped"] += len(failed)
+        _stats["flushed"] += written
+    return True
+
+
+def flush_audit_buffer() -> int:
+    """
+    Write everything buffered so far. Returns the number of events written.
+    """
+    total = 0
+    while True:
+        with _lock:
+            n = min(settings.audit_batch_size, len(_buffer))
+            batch = [_buffer.popleft() for _ in range(n)]
+        if not batch:
+            return total
+
+        if not _write_batch(batch):
+            with _lock:
+                _stats["failed_batches"] += 1
+                _buffer.extendleft(reversed(batch))
+            return total
+        total += len(batch)
+
+
+def _maintain() -> None:
+    from app.services.audit_partitions import run_audit_maintenance
+
+    try:
+        run_audit_maintenance()
+    except Exception:
+        logger.exception("audit partition maintenance failed")
+
+
+def _run() -> None:
+    # Partition upkeep piggybacks on the flusher: first pass right after startup
+    next_maintenance = time.monotonic()
+    while not _stop.is_set():
+        if time.monotonic() >= next_maintenance:
+            _maintain()
+            next_maintenance = time.monotonic() + settings.audit_maintenance_interval_seconds
+        _wake.wait(settings.audit_flush_interval_seconds)
+        _wake.clear()
+        flush_audit_buffer()
+
+
+def start_audit_writer() -> None:
+    global _thread
+    if _thread is not None or settings.audit_mode == "sync":
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="audit-writer", daemon=True)
+    _thread.start()
+
+
+def stop_audit_writer() -> None:
+    """
+    Stop the flusher and write whatever is still buffered (called on shutdown).
+    """
+    global _thread
+    if _thread is None:
+        return
+    _stop.set()
+    _wake.set()
+    _thread.join(timeout=10)
+    _thread = None
+    flush_audit_buffer()
+
+
+def audit_stats() -> dict:
+    with _lock:
+        return {**_stats, "pending": len(_buffer), "mode": settings.audit_mode}
@@ -0,0 +1,109 @@
+# Monthly partitions for audit_logs.
+# - ensure_audit_partitions: create this month's partition and the next few
+# - drop_expired_audit_partitions: drop whole partitions older than the retention window
+# Runs periodically from the audit writer thread. Can also be run from cron:
+#     python -m app.services.audit_partitions
+import logging
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "audit_logs"
+_NAME_RE = re.compile(r"^audit_logs_y(\d{4})m(\d{2})$")
+
+# Serialises partition DDL across workers
+_ADVISORY_LOCK_KEY = 0x6175646974  # "audit"
+
+
+def as_utc(dt: datetime) -> datetime:
+    """
+    Aware UTC datetime; naive values are taken to be UTC already.
+    """
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def month_start(dt: datetime) -> datetime:
+    # Partitions are UTC months: 2026-07-01T01:00+02:00 belongs to June
+    dt = as_utc(dt)
+    return datetime(dt.year, dt.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(dt: datetime, n: int) -> datetime:
+    m = dt.month - 1 + n
+    return datetime(dt.year + m // 12, m % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT_TABLE}_y{start.year:04d}m{start.month:02d}"
+
+
+def ensure_audit_partitions(db: Session, months_ahead: int | None = None, now: datetime | None = None) -> list[str]:
+    months_ahead = settings.audit_partition_months_ahead if months_ahead is None else months_ahead
+    first = month_start(now or datetime.now(timezone.utc))
+
+    db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+    created = []
+    for i in range(months_ahead + 1):
+        start = add_months(first, i)
+        end = add_months(start, 1)
+        name = partition_name(start)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def list_audit_partitions(db: Session) -> list[str]:
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent ORDER BY c.relname"
+    ), {"parent": PARENT_TABLE}).scalars().all()
+    return list(rows)
+
+
+def drop_expired_audit_partitions(db: Session, retention_months: int | None = None, now: datetime | None = None) -> list[str]:
+    """
+    Drop partitions whose whole month is older than the retention window.
+    Dropping a partition is a metadata operation, unlike DELETE ... WHERE created_at < ...
+    """
+    retention_months = settings.audit_retention_months if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -retention_months)
+
+    db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _ADVISORY_LOCK_KEY})
+    dropped = []
+    for name in list_audit_partitions(db):
+        m = _NAME_RE.match(name)
+        if not m:
+            continue
+        start = datetime(int(m.group(1)), int(m.group(2)), 1, tzinfo=timezone.utc)
+        if add_months(start, 1) <= cutoff:
+            db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    return dropped
+
+
+def run_audit_maintenance() -> None:
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        ensure_audit_partitions(db)
+        dropped = drop_expired_audit_partitions(db)
+        db.commit()
+    if dropped:
+        logger.info("audit partitions dropped: %s", ",".join(dropped))
+
+
+if __name__ == "__main__":
+    run_audit_maintenance()
@@ -0,0 +1,74 @@
+import re
+
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+def chunk_text(text: str, target_chars: int = 1800, overlap_sentences: int = 2) -> list[str]:
+    """
+    Paragraph + sentence-aware chunker.
+    - Split by paragraphs
+    - Split long paragraphs into sentences
+    - Accumulate into chunks around target_chars
+    - Overlap a few sentences between chunks
+    """
+    text = text.replace("\r\n", "\n").strip()
+    if not text:
+        return []
+
+    paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+    chunks: list[str] = []
+    buf: list[str] = []
+
+    def flush(b: list[str]):
+        s = " ".join(b).strip()
+        if s:
+            chunks.append(s)
+
+    for p in paragraphs:
+        if len(p) <= target_chars:
+            units = [p]
+        else:
+            units = [s.strip() for s in _SENT_SPLIT.split(p) if s.strip()]
+
+        for u in units:
+            if not buf:
+                buf = [u]
+                continue
+
+            if len(" ".join(buf)) + 1 + len(u) > target_chars:
+                flush(buf)
+                tail = buf[-overlap_sentences:] if overlap_sentences > 0 else []
+                buf = tail + [u]
+            else:
+                buf.append(u)
+
+    flush(buf)
+
+    # Merge tiny trailing fragments into previous chunk
+    merged: list[str] = []
+    for ch in chunks:
+        if merged and len(ch) < 320:
+            merged[-1] = (merged[-1] + " " + ch).strip()
+        else:
+            merged.append(ch)
+
+    return merged
+
+
+def split_sentences(text: str, max_chars: int = 400) -> list[str]:
+    """
+    Sentences of one chunk, whitespace-normalized, for extractive answers.
+    - Line breaks end a sentence (titles, headings, list items)
+    - Over-long runs without punctuation are cut at max_chars
+    """
+    out: list[str] = []
+    for line in text.splitlines():
+        for s in _SENT_SPLIT.split(line):
+            s = " ".join(s.split())
+            while len(s) > max_chars:
+                cut = s.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                out.append(s[:cut])
+                s = s[cut:].lstrip()
+            if s:
+                out.append(s)
+    return out
@@ -0,0 +1,282 @@
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from app.core.config import settings
+
+
+class IndexStore(ABC):
+    """
+    Blob store for RAG index artifacts, keyed by file-like names (tfidf_index_<user>.joblib).
+    - version() is a cheap change token (None when missing); it changes on every put
+    - put() returns the new version
+    - cheap_versions: version() is cheap enough to call on every read
+    """
+
+    cheap_versions = False
+
+    @abstractmethod
+    def get(self, name: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    def put(self, name: str, data: bytes) -> str:
+        ...
+
+    @abstractmethod
+    def delete(self, name: str) -> None:
+        ...
+
+    @abstractmethod
+    def version(self, name: str) -> str | None:
+        ...
+
+
+class LocalIndexStore(IndexStore):
+    """
+    Files under one directory. Single node only.
+    """
+
+    cheap_versions = True
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, name: str) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / name
+
+    def get(self, name: str) -> bytes | None:
+        try:
+            return self._path(name).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, name: str, data: bytes) -> str:
+        """
+        Temp file + fsync + rename: readers see the old or the new file, never a partial one.
+        """
+        path = self._path(name)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=f".{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        # Make the rename itself durable
+        dir_fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+        return self.version(name)
+
+    def delete(self, name: str) -> None:
+        self._path(name).unlink(missing_ok=True)
+
+    def version(self, name: str) -> str | None:
+        try:
+            st = self._path(name).stat()
+        except FileNotFoundError:
+            return None
+        # mtime alone is too coarse for back-to-back writes
+        return f"{st.st_ino}-{st.st_size}-{st.st_mtime_ns}"
+
+
+def _select(column, name: str):
+    from sqlalchemy import select
+
+    from app.models.index_artifact import IndexArtifact
+
+    return select(column).where(IndexArtifact.name == name)
+
+
+class PostgresIndexStore(IndexStore):
+    """
+    bytea rows in rag_index_artifacts; version is the sha256 of the blob.
+    Uses its own sessions, independent of the request's transaction.
+    """
+
+    def get(self, name: str) -> bytes | None:
+        from app.db.session import SessionLocal
+        from app.models.index_artifact import IndexArtifact
+
+        with SessionLocal() as db:
+            return db.scalar(_select(IndexArtifact.data, name))
+
+    def put(self, name: str, data: bytes) -> str:
+        from sqlalchemy import func
+        from sqlalchemy.dialects.postgresql import insert
+
+        from app.db.session import SessionLocal
+        from app.models.index_artifact import IndexArtifact
+
+        version = hashlib.sha256(data).hexdigest()
+        stmt = insert(IndexArtifact).values(name=name, data=data, version=version)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IndexArtifact.name],
+            set_={"data": stmt.excluded.data, "version": stmt.excluded.version, "updated_at": func.now()},
+        )
+        with SessionLocal() as db:
+            db.execute(stmt)
+            db.commit()
+        return version
+
+    def delete(self, name: str) -> None:
+        from sqlalchemy import delete
+
+        from app.db.session import SessionLocal
+        from app.models.index_artifact import IndexArtifact
+
+        with SessionLocal() as db:
+            db.execute(delete(IndexArtifact).where(IndexArtifact.name == name))
+            db.commit()
+
+    def version(self, name: str) -> str | None:
+        from app.db.session import SessionLocal
+        from app.models.index_artifact import IndexArtifact
+
+        with SessionLocal() as db:
+            return db.scalar(_select(IndexArtifact.version, name))
+
+
+def _s3_missing(e: Exception) -> bool:
+    code = getattr(e, "response", {}).get("Error", {}).get("Code")
+    return code in ("404", "NoSuchKey", "NotFound")
+
+
+class S3IndexStore(IndexStore):
+    """
+    Objects under bucket/prefix in any S3-compatible service (AWS, MinIO, ...).
+    version is the object's ETag. boto3 is optional and only needed for this backend.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", client=None, endpoint_url: str | None = None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError("RAG_INDEX_STORE=s3 requires boto3 (pip install boto3)") from e
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def get(self, name: str) -> bytes | None:
+        try:
+            obj = self.client.get_object(Bucket=self.bucket, Key=self._key(name))
+        except Exception as e:
+            if _s3_missing(e):
+                return None
+            raise
+        return obj["Body"].read()
+
+    def put(self, name: str, data: bytes) -> str:
+        res = self.client.put_object(Bucket=self.bucket, Key=self._key(name), Body=data)
+        return res["ETag"]
+
+    def delete(self, name: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    def version(self, name: str) -> str | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(name))["ETag"]
+        except Exception as e:
+            if _s3_missing(e):
+                return None
+            raise
+
+
+class CachedIndexStore(IndexStore):
+    """
+    Read-through local copy of a remote store: get() only downloads when the
+    remote version differs from the one cached with the local file.
+    """
+
+    def __init__(self, remote: IndexStore, cache_dir: Path):
+        self.remote = remote
+        self.local = LocalIndexStore(cache_dir)
+
+    def _cached(self, name: str) -> tuple[str, bytes] | None:
+        """
+        (version, data) of the local copy. Both live in one file (a version line, then the
+        blob), so concurrent refreshes can't pair one writer's bytes with another's version.
+        """
+        raw = self.local.get(name)
+        if raw is None:
+            return None
+        version, sep, data = raw.partition(b"\n")
+        if not sep:
+            return None
+        return version.decode(errors="replace"), data
+
+    def _remember(self, name: str, data: bytes, version: str) -> None:
+        self.local.put(name, version.encode() + b"\n" + data)
+
+    def _forget(self, name: str) -> None:
+        self.local.delete(name)
+
+    def get(self, name: str) -> bytes | None:
+        version = self.remote.version(name)
+        if version is None:
+            self._forget(name)
+            return None
+        cached = self._cached(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        data = self.remote.get(name)
+        if data is None:
+            self._forget(name)
+            return None
+        # If the blob changed between version() and get(), the next read re-downloads once
+        self._remember(name, data, version)
+        return data
+
+    def put(self, name: str, data: bytes) -> str:
+        version = self.remote.put(name, data)
+        self._remember(name, data, version)
+        return version
+
+    def delete(self, name: str) -> None:
+        self.remote.delete(name)
+        self._forget(name)
+
+    def version(self, name: str) -> str | None:
+        return self.remote.version(name)
+
+
+_remote_store: IndexStore | None = None
+
+
+def get_index_store(local_root: Path) -> IndexStore:
+    """
+    The store selected by RAG_INDEX_STORE. local_root is the local backend's directory.
+    """
+    global _remote_store
+    kind = settings.rag_index_store
+    if kind == "local":
+        return LocalIndexStore(local_root)
+
+    if _remote_store is None:
+        if kind == "postgres":
+            remote = PostgresIndexStore()
+        elif kind == "s3":
+            remote = S3IndexStore(
+                settings.rag_index_s3_bucket,
+                settings.rag_index_s3_prefix,
+                endpoint_url=settings.rag_index_s3_endpoint_url,
+            )
+        else:
+            raise RuntimeError(f"unknown RAG_INDEX_STORE: {kind}")
+        _remote_store = CachedIndexStore(remote, Path(settings.rag_index_cache_dir))
+    return _remote_store
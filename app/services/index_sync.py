@@ -0,0 +1,81 @@
+import json
+import logging
+import threading
+import uuid
+
+from app.core.config import settings
+from app.core.pubsub import publish, register_handler
+
+logger = logging.getLogger(__name__)
+
+INDEX_CHANGED_CHANNEL = "rag:index-changed"
+
+# Lets a worker ignore its own events: it already evicted when it wrote
+_origin = uuid.uuid4().hex
+
+_lock = threading.Lock()
+_stats = {"published": 0, "received": 0, "event_evictions": 0, "reconcile_runs": 0, "reconcile_evictions": 0}
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def notify_index_changed(user_id) -> None:
+    """
+    Tell every other worker/node that this user's published index changed.
+    """
+    publish(INDEX_CHANGED_CHANNEL, json.dumps({"user_id": str(user_id), "origin": _origin}))
+    with _lock:
+        _stats["published"] += 1
+
+
+def _on_index_changed(data: str) -> None:
+    from app.services.rag_index import evict_cached_index
+
+    event = json.loads(data)
+    with _lock:
+        _stats["received"] += 1
+    if event.get("origin") == _origin:
+        return
+    evict_cached_index(event["user_id"])
+    with _lock:
+        _stats["event_evictions"] += 1
+
+
+register_handler(INDEX_CHANGED_CHANNEL, _on_index_changed)
+
+
+def _run() -> None:
+    from app.services.rag_index import reconcile_index_cache
+
+    # Catches events missed while Redis or the listener was down
+    while not _stop.wait(settings.rag_index_reconcile_seconds):
+        try:
+            evicted = reconcile_index_cache()
+        except Exception:
+            logger.exception("rag index reconciliation failed")
+            continue
+        with _lock:
+            _stats["reconcile_runs"] += 1
+            _stats["reconcile_evictions"] += evicted
+
+
+def start_index_sync() -> None:
+    global _thread
+    if _thread is not None or settings.rag_index_reconcile_seconds <= 0:
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="index-reconcile", daemon=True)
+    _thread.start()
+
+
+def stop_index_sync() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+
+def index_sync_stats() -> dict:
+    with _lock:
+        return dict(_stats)
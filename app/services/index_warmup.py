@@ -0,0 +1,134 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from redis.exceptions import RedisError
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.rate_limiter import get_redis
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+# Sorted set: user_id -> unix time of the user's last RAG query
+RECENT_USERS_KEY = "rag:recent_users"
+# Keep a few times more members than we ever preload
+_RECENT_USERS_KEEP = 10
+
+_lock = threading.Lock()
+_progress = {"state": "idle", "target": 0, "loaded": 0, "skipped": 0, "failed": 0}
+_stop = threading.Event()
+_thread: threading.Thread | None = None
+
+
+def touch_recent_user(user_id) -> None:
+    """
+    Best effort: without Redis, warm-up falls back to rag.query audit events.
+    """
+    try:
+        r = get_redis()
+        pipe = r.pipeline(transaction=False)
+        pipe.zadd(RECENT_USERS_KEY, {str(user_id): time.time()})
+        pipe.zremrangebyrank(RECENT_USERS_KEY, 0, -(settings.rag_warmup_users * _RECENT_USERS_KEEP) - 1)
+        pipe.execute()
+    except RedisError:
+        pass
+
+
+def recent_rag_users(db, limit: int) -> list[str]:
+    """
+    Most recently active RAG users, newest first: Redis recency set, else the audit log.
+    """
+    try:
+        users = get_redis().zrevrange(RECENT_USERS_KEY, 0, limit - 1)
+        if users:
+            return list(users)
+    except RedisError:
+        logger.warning("index warm-up: redis unavailable, ranking users from audit_logs")
+
+    # Last week only, so partition pruning keeps this to one or two partitions
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+    last_query = func.max(AuditLog.created_at)
+    rows = db.execute(
+        select(AuditLog.actor_user_id, last_query)
+        .where(AuditLog.event_type == "rag.query", AuditLog.created_at >= since, AuditLog.actor_user_id.is_not(None))
+        .group_by(AuditLog.actor_user_id)
+        .order_by(last_query.desc())
+        .limit(limit)
+    ).all()
+    return [str(r[0]) for r in rows]
+
+
+def _set(**kw) -> None:
+    with _lock:
+        _progress.update(kw)
+
+
+def _run() -> None:
+    from app.db.session import SessionLocal
+    from app.services.rag_index import warm_user_index
+
+    db = SessionLocal()
+    try:
+        users = recent_rag_users(db, settings.rag_warmup_users)
+        _set(state="running", target=len(users), started_at=time.time())
+        for user_id in users:
+            if _stop.is_set():
+                break
+            try:
+                loaded = warm_user_index(db, user_id)
+                if loaded is False:
+                    # Memory budget reached; the remaining users load on first query
+                    break
+                with _lock:
+                    _progress["loaded" if loaded else "skipped"] += 1
+            except Exception:
+                logger.exception("index warm-up failed user_id=%s", user_id)
+                with _lock:
+                    _progress["failed"] += 1
+            finally:
+                db.rollback()
+    except Exception:
+        logger.exception("index warm-up aborted")
+    finally:
+        db.close()
+        _set(state="done", finished_at=time.time())
+
+
+def start_index_warmup() -> None:
+    """
+    Preload recently active users' indexes in the background; never delays startup.
+    """
+    global _thread
+    if _thread is not None:
+        return
+    if settings.rag_warmup_users <= 0:
+        _set(state="disabled")
+        return
+    _stop.clear()
+    _set(state="starting")
+    _thread = threading.Thread(target=_run, name="index-warmup", daemon=True)
+    _thread.start()
+
+
+def stop_index_warmup() -> None:
+    global _thread
+    _stop.set()
+    if _thread is not None:
+        _thread.join(timeout=5)
+        _thread = None
+
+
+def warmup_progress() -> dict:
+    """
+    ratio is (loaded + skipped) / target; 1.0 once warm-up has finished or when it is not running.
+    """
+    with _lock:
+        p = dict(_progress)
+    if p["state"] in ("starting", "running"):
+        p["ratio"] = (p["loaded"] + p["skipped"]) / p["target"] if p["target"] else 0.0
+    else:
+        p["ratio"] = 1.0
+    return p
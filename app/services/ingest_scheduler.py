@@ -0,0 +1,217 @@
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class IngestBacklogFull(Exception):
+    """
+    Raised by check_ingest_admission; retry_after is a rough wait in seconds.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"ingestion backlog full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Job:
+    fn: Callable[..., Any]
+    args: tuple
+    cost: int
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+# Per-tenant FIFO queues served by deficit round robin: each turn a tenant earns
+# RAG_INGEST_QUANTUM_BYTES of credit and runs jobs while their cost (text bytes) fits.
+# One tenant's huge corpus therefore gets the same byte share as everyone else's uploads.
+_cond = threading.Condition()
+_queues: dict[str, deque[_Job]] = {}
+_active: deque[str] = deque()
+_deficit: dict[str, int] = {}
+_granted: set[str] = set()
+_running = 0
+_threads: list[threading.Thread] = []
+_stop = threading.Event()
+
+_stats = {"submitted": 0, "completed": 0, "failed": 0, "rejected": 0}
+# EWMA per tenant of how long its jobs waited (most recently served last, bounded),
+# and of job run time overall
+_MAX_WAIT_TRACKED = 10_000
+_wait_ewma: OrderedDict[str, float] = OrderedDict()
+_run_ewma = 1.0
+_EWMA_ALPHA = 0.2
+
+# Per worker process: with N workers up to N times as many run on the host
+_chunking_slots = threading.BoundedSemaphore(settings.rag_ingest_max_chunking)
+_index_slots = threading.BoundedSemaphore(settings.rag_ingest_max_index_builds)
+
+
+@contextmanager
+def chunking_slot() -> Iterator[None]:
+    """
+    Per-worker cap on concurrent chunking (RAG_INGEST_MAX_CHUNKING), across all tenants.
+    """
+    with _chunking_slots:
+        yield
+
+
+@contextmanager
+def index_build_slot() -> Iterator[None]:
+    """
+    Per-worker cap on concurrent index rebuilds (RAG_INGEST_MAX_INDEX_BUILDS), across all tenants.
+    """
+    with _index_slots:
+        yield
+
+
+def _backlog() -> int:
+    return sum(len(q) for q in _queues.values())
+
+
+def check_ingest_admission(tenant: str) -> None:
+    """
+    Raise IngestBacklogFull when the worker's backlog, or this tenant's, is over its limit.
+    """
+    with _cond:
+        total = _backlog()
+        mine = len(_queues.get(tenant, ()))
+        if total < settings.rag_ingest_max_backlog and mine < settings.rag_ingest_max_tenant_backlog:
+            return
+        _stats["rejected"] += 1
+        # Rough time for the queue that is over its limit to drain
+        queued = mine if mine >= settings.rag_ingest_max_tenant_backlog else total
+        retry_after = math.ceil(queued * _run_ewma / max(len(_threads), 1))
+    raise IngestBacklogFull(min(max(retry_after, 1), 300))
+
+
+def submit_ingest(tenant: str, cost: int, fn: Callable[..., Any], *args: Any) -> bool:
+    """
+    Queue fn(*args) under tenant. False when the scheduler isn't running (e.g. no lifespan);
+    the caller then runs the job some other way.
+    """
+    if not _threads:
+        return False
+    with _cond:
+        if tenant not in _queues:
+            _queues[tenant] = deque()
+            _active.append(tenant)
+            _deficit[tenant] = 0
+        _queues[tenant].append(_Job(fn, args, max(int(cost), 1)))
+        _stats["submitted"] += 1
+        _cond.notify()
+    return True
+
+
+def _pick() -> tuple[str, _Job] | None:
+    # Caller holds _cond
+    while _active:
+        tenant = _active[0]
+        if tenant not in _granted:
+            _deficit[tenant] += settings.rag_ingest_quantum_bytes
+            _granted.add(tenant)
+        queue = _queues[tenant]
+        job = queue[0]
+        if job.cost <= _deficit[tenant]:
+            queue.popleft()
+            _deficit[tenant] -= job.cost
+            if not queue:
+                # Idle tenants don't bank credit
+                _active.popleft()
+                _granted.discard(tenant)
+                del _queues[tenant], _deficit[tenant]
+            return tenant, job
+        _granted.discard(tenant)
+        _active.rotate(-1)
+    return None
+
+
+def _run() -> None:
+    global _running, _run_ewma
+    while True:
+        with _cond:
+            picked = _pick()
+            while picked is None:
+                if _stop.is_set():
+                    return
+                _cond.wait(1.0)
+                picked = _pick()
+            tenant, job = picked
+            # Every job counts, including a tenant's last queued one (often its only one)
+            waited = time.monotonic() - job.enqueued_at
+            prev = _wait_ewma.pop(tenant, None)
+            _wait_ewma[tenant] = waited if prev is None else prev + _EWMA_ALPHA * (waited - prev)
+            if len(_wait_ewma) > _MAX_WAIT_TRACKED:
+                _wait_ewma.popitem(last=False)
+            _running += 1
+
+        t0 = time.monotonic()
+        ok = True
+        try:
+            job.fn(*job.args)
+        except Exception:
+            ok = False
+            logger.exception("ingest job failed tenant=%s", tenant)
+        with _cond:
+            _running -= 1
+            _stats["completed" if ok else "failed"] += 1
+            _run_ewma += _EWMA_ALPHA * ((time.monotonic() - t0) - _run_ewma)
+
+
+def start_ingest_scheduler() -> None:
+    if _threads:
+        return
+    _stop.clear()
+    for i in range(settings.rag_ingest_workers):
+        t = threading.Thread(target=_run, name=f"ingest-{i}", daemon=True)
+        t.start()
+        _threads.append(t)
+
+
+def stop_ingest_scheduler() -> None:
+    """
+    Finish queued jobs, then stop (called on shutdown). Anything left after the timeout is lost,
+    as it would be with BackgroundTasks; such documents stay "processing".
+    """
+    _stop.set()
+    with _cond:
+        _cond.notify_all()
+    deadline = time.monotonic() + 30
+    for t in _threads:
+        t.join(timeout=max(deadline - time.monotonic(), 0))
+    _threads.clear()
+
+
+def ingest_scheduler_stats(top: int = 20) -> dict:
+    """
+    Totals, queue depth and wait times of the top tenants by depth, and the average
+    wait of the most recently served tenants (queued or not).
+    """
+    now = time.monotonic()
+    with _cond:
+        tenants = sorted(_queues.items(), key=lambda kv: len(kv[1]), reverse=True)[:top]
+        recent = list(_wait_ewma.items())[-top:][::-1] if top > 0 else []
+        return {
+            **_stats,
+            "running": _running,
+            "backlog": _backlog(),
+            "workers": len(_threads),
+            "avg_run_seconds": round(_run_ewma, 3),
+            "tenants": {
+                tenant: {
+                    "depth": len(queue),
+                    "oldest_wait_seconds": round(now - queue[0].enqueued_at, 3),
+                    "avg_wait_seconds": round(_wait_ewma.get(tenant, 0.0), 3),
+                }
+                for tenant, queue in tenants
+            },
+            "recent_tenants": {tenant: {"avg_wait_seconds": round(wait, 3)} for tenant, wait in recent},
+        }
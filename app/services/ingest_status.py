@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.core.pubsub import publish, register_handler
+
+logger = logging.getLogger(__name__)
+
+INGEST_STATUS_CHANNEL = "rag:ingest-status"
+TERMINAL_STATUSES = ("ready", "failed")
+
+# Lets a worker skip its own events: they were already delivered locally
+_origin = uuid.uuid4().hex
+
+# Latest progress of documents still being ingested, fed by every worker's events
+_MAX_TRACKED = 10_000
+_lock = threading.Lock()
+_latest: dict[str, dict] = {}
+# document_id -> queues of requests waiting on it, with the event loop that owns each queue
+_watchers: dict[str, list[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+
+def publish_ingest_status(
+    document_id,
+    status: str,
+    phase: str,
+    chunks_inserted: int = 0,
+    chunks_total: int | None = None,
+) -> None:
+    """
+    Called from ingest_document_job at each phase change. Best effort, like all pub/sub here.
+    """
+    event = {
+        "document_id": str(document_id),
+        "status": status,
+        "phase": phase,
+        "chunks_inserted": chunks_inserted,
+        "chunks_total": chunks_total,
+        "at": time.time(),
+    }
+    _deliver(event)
+    publish(INGEST_STATUS_CHANNEL, json.dumps({**event, "origin": _origin}))
+
+
+def _deliver(event: dict) -> None:
+    document_id = event["document_id"]
+    with _lock:
+        if event["status"] in TERMINAL_STATUSES:
+            # The documents row has the final state
+            _latest.pop(document_id, None)
+        else:
+            _latest[document_id] = event
+            if len(_latest) > _MAX_TRACKED:
+                _latest.pop(next(iter(_latest)))
+        watchers = list(_watchers.get(document_id, ()))
+    for loop, queue in watchers:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+        except RuntimeError:
+            # Loop already closed; its request is gone
+            pass
+
+
+def _on_ingest_status(data: str) -> None:
+    event = json.loads(data)
+    if event.pop("origin", None) == _origin:
+        return
+    _deliver(event)
+
+
+register_handler(INGEST_STATUS_CHANNEL, _on_ingest_status)
+
+
+def ingest_progress(document_id) -> dict | None:
+    """
+    Last progress event for a document still being ingested, if this worker has seen one.
+    """
+    with _lock:
+        return _latest.get(str(document_id))
+
+
+@contextmanager
+def watch_ingest(document_id) -> Iterator[asyncio.Queue]:
+    """
+    Queue of this document's status events, for the duration of the block.
+    Enter it before reading the current status, so no event falls in between.
+    """
+    key = (asyncio.get_running_loop(), asyncio.Queue())
+    document_id = str(document_id)
+    with _lock:
+        _watchers.setdefault(document_id, []).append(key)
+    try:
+        yield key[1]
+    finally:
+        with _lock:
+            watchers = _watchers.get(document_id, [])
+            watchers.remove(key)
+            if not watchers:
+                _watchers.pop(document_id, None)
+
+
+async def wait_for_ingest(queue: asyncio.Queue, timeout: float) -> dict | None:
+    """
+    The next terminal (ready/failed) event from a watch_ingest queue, or None on timeout.
+    """
+    try:
+        async with asyncio.timeout(timeout):
+            while True:
+                event = await queue.get()
+                if event["status"] in TERMINAL_STATUSES:
+                    return event
+    except TimeoutError:
+        return None
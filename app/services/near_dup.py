@@ -0,0 +1,59 @@
+# Near-duplicate detection for chunks: 64-bit SimHash over word 3-gram shingles,
+# and a banded LSH table. Two chunks are near-duplicates when their signatures differ
+# in at most MAX_DISTANCE bits; with BANDS 16-bit bands any such pair shares at least
+# one band exactly (pigeonhole), so a lookup only compares against one bucket per band.
+import hashlib
+import re
+from typing import Any
+
+MAX_DISTANCE = 3
+BANDS = 4
+_BAND_BITS = 64 // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_WORD = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """
+    Unsigned 64-bit signature; case and whitespace/punctuation differences don't change it.
+    """
+    import numpy as np
+
+    words = _WORD.findall(text.lower())
+    if not words:
+        return 0
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+    digests = b"".join(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest() for s in shingles)
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8)).reshape(-1, 64)
+    # Majority vote per bit position
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 > len(shingles)
+    return int.from_bytes(np.packbits(votes).tobytes(), "big")
+
+
+def _band_keys(sig: int) -> list[int]:
+    return [(b << _BAND_BITS) | ((sig >> (b * _BAND_BITS)) & _BAND_MASK) for b in range(BANDS)]
+
+
+class LSHTable:
+    """
+    Signature -> value lookup that tolerates up to MAX_DISTANCE differing bits.
+    Plain dicts and lists, so it pickles into index artifacts.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: dict[int, list[tuple[int, Any]]] = {}
+
+    def find(self, sig: int) -> Any | None:
+        """
+        Value of the first stored signature within MAX_DISTANCE bits of sig, if any.
+        """
+        for key in _band_keys(sig):
+            for other, value in self.buckets.get(key, ()):
+                if (sig ^ other).bit_count() <= MAX_DISTANCE:
+                    return value
+        return None
+
+    def add(self, sig: int, value: Any) -> None:
+        for key in _band_keys(sig):
+            self.buckets.setdefault(key, []).append((sig, value))
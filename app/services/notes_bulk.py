@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+import uuid
+from typing import Iterator
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.note import Note
+
+
+def copy_notes(owner_id, rows: list[tuple[str, str]]) -> int:
+    """
+    Insert (title, content) rows for one owner with a single COPY, in one transaction.
+    """
+    from app.db.session import engine
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for title, content in rows:
+        writer.writerow([str(uuid.uuid4()), str(owner_id), title, content])
+    buf.seek(0)
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+        cur.copy_expert("COPY notes (id, owner_id, title, content) FROM STDIN WITH (FORMAT csv)", buf)
+        raw.commit()
+    finally:
+        raw.close()
+    return len(rows)
+
+
+def iter_notes_ndjson(owner_id) -> Iterator[str]:
+    """
+    Stream one owner's notes as NDJSON, oldest first.
+    yield_per makes psycopg2 use a server-side cursor, so memory stays flat.
+    Opens its own Session: the request's session is closed before streaming ends.
+    """
+    from app.db.session import SessionLocal
+
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(Note.id, Note.title, Note.content, Note.created_at, Note.updated_at)
+            .where(Note.owner_id == owner_id)
+            .order_by(Note.created_at.asc(), Note.id.asc())
+            .execution_options(yield_per=settings.notes_export_batch_size)
+        )
+        for part in result.partitions():
+            yield "".join(
+                json.dumps(
+                    {
+                        "id": str(r.id),
+                        "title": r.title,
+                        "content": r.content,
+                        "created_at": r.created_at.isoformat() if r.created_at else None,
+                        "updated_at": r.updated_at.isoformat() if r.updated_at else None,
+                    },
+                    ensure_ascii=False,
+                ) + "\n"
+                for r in part
+            )
+    finally:
+        db.close()
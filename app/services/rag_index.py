@@ -1,37 +1,180 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 import hashlib
-
-import joblib
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
+import heapq
+import io
+import json
+import logging
+import threading
+import time
+import uuid
+
+from redis.exceptions import RedisError
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 
+from app.core.config import settings
+from app.core.rate_limiter import get_redis
 from app.models.chunk import Chunk
-from app.models.document import Document
+from app.models.note import Note
+from app.services.chunking import chunk_text, split_sentences
+from app.services.index_store import IndexStore, get_index_store
+from app.services.index_sync import notify_index_changed
+from app.services.near_dup import LSHTable, simhash
+
+# joblib / numpy / scipy / sklearn are imported inside the functions that use them:
+# importing app.main (every worker boot, every test run) should not pay for the ML stack.
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = Path("data")
 
 # Day 4, user-insensitive chunks
 INDEX_PATH = DATA_DIR / "tfidf_index.joblib"
 
+# Bumped whenever the artifact layout changes; older artifacts are rebuilt on load.
+# 2: hashed TF-IDF, note rows, per-row snippets, base_version for deltas
+# 3: immutable checksummed artifacts published through a manifest
+# 4: per-row sentences and sentence vectors for extractive answers
+# 5: near-duplicate chunks collapsed (SimHash dup_keys, LSH table for deltas and ingestion)
+# 6: sparse IDF over the corpus' hashed columns instead of a fitted TfidfTransformer
+INDEX_FORMAT = 6
+
+
+class IndexUnavailable(Exception):
+    """
+    The user's index is missing or corrupt and could not be rebuilt in time.
+    """
+
+
+class _CorruptArtifact(Exception):
+    pass
+
+
+def _manifest_name(user_id: str, kind: str) -> str:
+    return f"tfidf_{kind}_{user_id}.manifest.json"
+
+
 # Day 5 per-user indexing
+def user_index_name(user_id: str) -> str:
+    return _manifest_name(user_id, "index")
+
+
+# Note edits since the last full rebuild, scored with the base vectorizer
+def user_delta_name(user_id: str) -> str:
+    return _manifest_name(user_id, "delta")
+
+
+# Where the local store (RAG_INDEX_STORE=local) keeps them
 def user_index_path(user_id: str) -> Path:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    return DATA_DIR / f"tfidf_index_{user_id}.joblib"
+    return DATA_DIR / user_index_name(user_id)
+
+
+def user_delta_path(user_id: str) -> Path:
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return DATA_DIR / user_delta_name(user_id)
+
+
+def _store() -> IndexStore:
+    return get_index_store(DATA_DIR)
+
+
+# Artifacts are immutable, content-addressed blobs (tfidf_index_<user>.<sha>.joblib). Readers
+# find the current one through a small manifest that is replaced atomically, so they see
+# either the old or the new index, never a partial write, and never wait for a writer.
+def _read_manifest(user_id: str, kind: str) -> dict[str, Any] | None:
+    data = _store().get(_manifest_name(user_id, kind))
+    if data is None:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError as e:
+        raise _CorruptArtifact(_manifest_name(user_id, kind)) from e
+
+
+def _publish(user_id: str, kind: str, payload: dict[str, Any]) -> None:
+    import joblib
+
+    buf = io.BytesIO()
+    joblib.dump(payload, buf)
+    data = buf.getvalue()
+    digest = hashlib.sha256(data).hexdigest()
+    name = f"tfidf_{kind}_{user_id}.{digest[:16]}.joblib"
+
+    store = _store()
+    store.put(name, data)
+    try:
+        old = _read_manifest(user_id, kind)
+    except _CorruptArtifact:
+        old = None
+    previous = old["artifact"] if old and old["artifact"] != name else None
+    manifest = {
+        "format": INDEX_FORMAT,
+        "artifact": name,
+        "sha256": digest,
+        "size": len(data),
+        "previous": previous,
+        "published_at": time.time(),
+    }
+    store.put(_manifest_name(user_id, kind), json.dumps(manifest).encode())
+
+    # Keep one previous artifact for readers that fetched the old manifest just before the swap
+    if old and old.get("previous") and old["previous"] not in (name, previous):
+        store.delete(old["previous"])
+
+
+def _unpublish(user_id: str, kind: str) -> None:
+    try:
+        old = _read_manifest(user_id, kind)
+    except _CorruptArtifact:
+        old = None
+    store = _store()
+    store.delete(_manifest_name(user_id, kind))
+    if old:
+        for name in (old.get("artifact"), old.get("previous")):
+            if name:
+                store.delete(name)
+
+
+def _fetch(user_id: str, kind: str) -> dict[str, Any] | None:
+    """
+    The published payload, None if nothing is published.
+    Raises _CorruptArtifact if the artifact is missing or fails its checksum.
+    """
+    import joblib
+
+    for _ in range(2):
+        manifest = _read_manifest(user_id, kind)
+        if manifest is None:
+            return None
+        data = _store().get(manifest["artifact"])
+        if data is not None and hashlib.sha256(data).hexdigest() == manifest["sha256"]:
+            try:
+                return joblib.load(io.BytesIO(data))
+            except Exception:
+                pass
+        # A writer may have swapped the manifest and cleaned up under us: look once more
+    logger.warning("rag index artifact missing or corrupt user_id=%s kind=%s", user_id, kind)
+    raise _CorruptArtifact(manifest["artifact"])
+
 
 @dataclass
 class Citation:
-    chunk_id: str
-    document_id: str
+    chunk_id: str | None
+    document_id: str | None
     score: float
     snippet: str
+    note_id: str | None = None
+    # (loaded index, its base or delta part, row) this came from, for answer extraction
+    row: tuple[dict[str, Any], dict[str, Any], int] | None = field(default=None, repr=False, compare=False)
 
 
 def _snippet(text: str, max_len: int = 260) -> str:
@@ -39,62 +182,668 @@ def _snippet(text: str, max_len: int = 260) -> str:
     return t if len(t) <= max_len else t[: max_len - 3] + "..."
 
 
+def _note_key(note_id: str, i: int) -> str:
+    return f"note:{note_id}:{i}"
+
+
+def note_chunks(title: str, content: str) -> list[str]:
+    return chunk_text(f"{title}\n\n{content}")
+
+
+class _HashedTfidf:
+    """
+    HashingVectorizer counts weighted like TfidfTransformer's defaults (smoothed IDF, l2 norm).
+    Only columns that occur in the corpus keep an IDF (sorted cols/vals); every other column
+    gets the df=0 value. A dense 2**20 IDF would cost 8 MB per user in every artifact and cache entry.
+    """
+
+    def __init__(self):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        # Hashed features instead of a fitted vocabulary: note deltas are transformed
+        # with the base IDF, and terms the base never saw still get a (high) weight.
+        self.hasher = HashingVectorizer(
+            stop_words="english",
+            ngram_range=(1, 2),
+            n_features=2**20,
+            alternate_sign=False,
+            norm=None,
+        )
+        self.cols = None
+        self.vals = None
+        self.default = 1.0
+
+    def fit_transform(self, texts: list[str]):
+        import numpy as np
+
+        counts = self.hasher.transform(texts)
+        n = counts.shape[0]
+        cols, df = np.unique(counts.indices, return_counts=True)
+        self.cols = cols.astype(np.int32)
+        self.vals = np.log((1 + n) / (1 + df)) + 1.0
+        self.default = float(np.log(1 + n) + 1.0)
+        return self._weigh(counts)
+
+    def transform(self, texts: list[str]):
+        return self._weigh(self.hasher.transform(texts))
+
+    def _weigh(self, counts):
+        import numpy as np
+        from sklearn.preprocessing import normalize
+
+        x = counts.tocsr().astype(np.float64)
+        if len(self.cols):
+            pos = np.minimum(np.searchsorted(self.cols, x.indices), len(self.cols) - 1)
+            x.data *= np.where(self.cols[pos] == x.indices, self.vals[pos], self.default)
+        else:
+            x.data *= self.default
+        return normalize(x, norm="l2", copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        return self.cols.nbytes + self.vals.nbytes
+
+
+def _new_vectorizer() -> _HashedTfidf:
+    return _HashedTfidf()
+
+
+def _sentence_vectors(vectorizer, texts: list[str]) -> tuple[list[list[str]], Any, Any]:
+    """
+    Per-row sentences, their TF-IDF vectors (one matrix row per sentence) and
+    sent_ptr: row i owns sentence rows sent_ptr[i]:sent_ptr[i + 1].
+    """
+    sentences = [split_sentences(t) for t in texts]
+    flat = [x for row in sentences for x in row]
+    sent_matrix = vectorizer.transform(flat) if flat else None
+    return sentences, sent_matrix, _sent_ptr(sentences)
+
+
+def _sent_ptr(sentences: list[list[str]]):
+    import numpy as np
+
+    return np.concatenate([[0], np.cumsum([len(row) for row in sentences], dtype=np.int64)]).astype(np.int64)
+
+
+_user_locks_guard = threading.Lock()
+
+
 def rebuild_index_user(db: Session, user_id: str) -> None:
     """
-    Rebuild TF-IDF artifacts for all chunks and persist to disk.
+    Rebuild TF-IDF artifacts for all chunks and notes and persist to disk.
     Day 4: also store a chunk_id -> row index map for fast slicing.
+    Folds any pending note delta into the new base.
+    Document chunks that are near-duplicates (SimHash) of an earlier chunk share its row;
+    every row carries its duplicate group key, so query-time dedupe compares integers.
     """
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
+    user_id = str(user_id)
+    # Reads and publishes under the writer lock, so a note delta can't land between the
+    # note read and the publish (which drops pending deltas)
+    with _rebuild_lock(user_id, wait=settings.rag_rebuild_lock_seconds):
+        _rebuild_index_user(db, user_id)
+
 
+def _rebuild_index_user(db: Session, user_id: str) -> None:
     # chunks = db.scalars(select(Chunk).order_by(Chunk.created_at.asc())).all()
     # Day 5, now we only extract chunks from the specific user's uploaded docs.
     chunks = db.scalars(
         select(Chunk)
-        .join(Document, Chunk.document_id == Document.id)
-        .where(Document.owner_id == user_id)
-        .order_by(Chunk.created_at.asc())
+        .where(Chunk.owner_id == user_id)
+        # An upload's chunks share one created_at: the tie-break keeps the surviving copy of a
+        # near-duplicate stable across rebuilds and in line with ingestion's near_dup_of
+        .order_by(Chunk.created_at.asc(), Chunk.document_id.asc(), Chunk.chunk_index.asc())
     ).all()
-    texts = [c.text for c in chunks]
-    chunk_ids = [str(c.id) for c in chunks]
-    doc_ids = [str(c.document_id) for c in chunks]
-
-    if not texts:
-        joblib.dump(
-            {"vectorizer": None, "matrix": None, "chunk_ids": [], "doc_ids": [], "id_to_row": {}},
-            user_index_path(user_id),
-        )
+    lsh = LSHTable()
+    # Same groups keyed to the chunk id ingestion should point at (None for notes)
+    ingest_lsh = LSHTable()
+    texts: list[str] = []
+    chunk_ids: list[str] = []
+    doc_ids: list[str | None] = []
+    note_ids: list[str | None] = []
+    dup_keys: list[int] = []
+    # Collapsed chunk id -> row of the chunk it duplicates (boilerplate headers, footers, ...)
+    aliases: dict[str, int] = {}
+    for c in chunks:
+        sig = (c.meta_data or {}).get("simhash")
+        if sig is None:
+            sig = simhash(c.text)
+        rep = lsh.find(sig)
+        if rep is not None:
+            aliases[str(c.id)] = rep[1]
+            continue
+        lsh.add(sig, (sig, len(texts)))
+        ingest_lsh.add(sig, (sig, str(c.id)))
+        texts.append(c.text)
+        chunk_ids.append(str(c.id))
+        doc_ids.append(str(c.document_id))
+        note_ids.append(None)
+        dup_keys.append(sig)
+
+    notes = db.execute(
+        select(Note.id, Note.title, Note.content)
+        .where(Note.owner_id == user_id)
+        .order_by(Note.created_at.asc())
+    ).all()
+    for n in notes:
+        for i, ch in enumerate(note_chunks(n.title, n.content)):
+            # Notes keep their rows (deltas tombstone them per note), only their dedupe key is shared
+            sig = simhash(ch)
+            rep = lsh.find(sig)
+            if rep is None:
+                rep = (sig, len(texts))
+                lsh.add(sig, rep)
+                ingest_lsh.add(sig, (sig, None))
+            texts.append(ch)
+            chunk_ids.append(_note_key(str(n.id), i))
+            doc_ids.append(None)
+            note_ids.append(str(n.id))
+            dup_keys.append(rep[0])
+
+    note_rows: dict[str, list[int]] = {}
+    for i, nid in enumerate(note_ids):
+        if nid is not None:
+            note_rows.setdefault(nid, []).append(i)
+
+    payload: dict[str, Any] = {
+        "format": INDEX_FORMAT,
+        "base_version": uuid.uuid4().hex,
+        "vectorizer": None,
+        "matrix": None,
+        "chunk_ids": chunk_ids,
+        "doc_ids": doc_ids,
+        "note_ids": note_ids,
+        "snippets": [_snippet(t) for t in texts],
+        "id_to_row": {**aliases, **{cid: i for i, cid in enumerate(chunk_ids)}},
+        "note_rows": note_rows,
+        "dup_keys": dup_keys,
+        # (signature, row) of each group's first row; deltas and ingestion look up against it
+        "lsh": lsh,
+    }
+
+    payload["sentences"], payload["sent_matrix"], payload["sent_ptr"] = [], None, _sent_ptr([])
+    if texts:
+        vectorizer = _new_vectorizer()
+        payload["vectorizer"] = vectorizer
+        payload["matrix"] = vectorizer.fit_transform(texts)
+        payload["sentences"], payload["sent_matrix"], payload["sent_ptr"] = _sentence_vectors(vectorizer, texts)
+
+    _publish(user_id, "index", payload)
+    # Small enough for every upload's near-duplicate check to fetch
+    _publish(user_id, "lsh", {"format": INDEX_FORMAT, "lsh": ingest_lsh})
+    # The new base already contains every note; older deltas no longer apply
+    _unpublish(user_id, "delta")
+    # Format 2 wrote plain files under these names
+    _store().delete(f"tfidf_index_{user_id}.joblib")
+    _store().delete(f"tfidf_delta_{user_id}.joblib")
+    evict_cached_index(user_id)
+    notify_index_changed(user_id)
+
+
+def _fetch_base(user_id: str) -> dict[str, Any] | None:
+    try:
+        payload = _fetch(user_id, "index")
+    except _CorruptArtifact:
+        return None
+    if payload is None or payload.get("format") != INDEX_FORMAT:
+        return None
+    return payload
+
+
+# user_id -> [lock, threads holding or waiting on it]; the entry goes once nobody uses it
+_rebuild_locks: dict[str, list] = {}
+# Users whose lock the current thread holds (rebuilds run inside delta writes and vice versa)
+_rebuild_locks_held = threading.local()
+
+
+@contextmanager
+def _rebuild_lock(user_id: str, wait: float | None = None) -> Iterator[None]:
+    """
+    Per-user writer lock around every read-build-publish of a user's index (rebuilds and
+    note deltas): a local lock between this worker's threads, then a Redis lock between
+    workers and nodes. Re-entrant within a thread. Without Redis it degrades to the local
+    lock. Raises IndexUnavailable after wait seconds (rag_rebuild_wait_seconds by default).
+    """
+    held: set[str] = _rebuild_locks_held.__dict__.setdefault("users", set())
+    if user_id in held:
+        yield
         return
-
-    vectorizer = TfidfVectorizer(
-        stop_words="english",
-        max_features=50_000,
-        ngram_range=(1, 2),
-    )
-    matrix = vectorizer.fit_transform(texts)
-
-    id_to_row = {cid: i for i, cid in enumerate(chunk_ids)}
-
-    joblib.dump(
-        {
-            "vectorizer": vectorizer,
-            "matrix": matrix,
-            "chunk_ids": chunk_ids,
-            "doc_ids": doc_ids,
-            "id_to_row": id_to_row,
-        },
-        user_index_path(user_id),
-    )
+    if wait is None:
+        wait = settings.rag_rebuild_wait_seconds
+    deadline = time.monotonic() + wait
+    with _user_locks_guard:
+        entry = _rebuild_locks.setdefault(user_id, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        if not entry[0].acquire(timeout=wait):
+            raise IndexUnavailable(user_id)
+        try:
+            try:
+                shared = get_redis().lock(
+                    f"rag:rebuild:{user_id}",
+                    timeout=settings.rag_rebuild_lock_seconds,
+                    blocking_timeout=max(deadline - time.monotonic(), 0),
+                )
+                acquired = shared.acquire()
+            except RedisError:
+                logger.warning("rebuild lock: redis unavailable, locking user_id=%s in this worker only", user_id)
+                shared, acquired = None, True
+            if not acquired:
+                raise IndexUnavailable(user_id)
+            held.add(user_id)
+            try:
+                yield
+            finally:
+                held.discard(user_id)
+                if shared is not None:
+                    try:
+                        shared.release()
+                    except RedisError:
+                        # Lease ran out mid-write; nothing left to release
+                        pass
+        finally:
+            entry[0].release()
+    finally:
+        with _user_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _rebuild_locks[user_id]
+
+
+def _rebuild_single_flight(db: Session, user_id: str, stale_base_version: str | None = None) -> dict[str, Any]:
+    """
+    Rebuild a missing/corrupt index once across workers: concurrent callers wait for the
+    first one and then read what it published. Raises IndexUnavailable after
+    rag_rebuild_wait_seconds.
+    stale_base_version forces a rebuild even if that base is still readable (broken delta).
+    """
+    with _rebuild_lock(user_id):
+        # Whoever held the lock before us may have just published a good index
+        payload = _fetch_base(user_id)
+        if payload is not None and payload["base_version"] != stale_base_version:
+            return payload
+        rebuild_index_user(db, user_id)
+        payload = _fetch_base(user_id)
+        if payload is None:
+            raise IndexUnavailable(user_id)
+        return payload
 
 
-def _load_index(db: Session, user_id: str) -> dict[str, Any]:
+def _load_base(db: Session, user_id: str) -> dict[str, Any]:
     # if not INDEX_PATH.exists():
     #     rebuild_index(db)
     # return joblib.load(INDEX_PATH)
 
     # Day 5, now loading index is performed per-user.
-    if not user_index_path(user_id):
-        rebuild_index_user(db, user_id)
-    return joblib.load(user_index_path(user_id))
+    payload = _fetch_base(user_id)
+    if payload is None:
+        payload = _rebuild_single_flight(db, user_id)
+    return payload
+
+
+def _empty_delta(base_version: str) -> dict[str, Any]:
+    return {
+        "base_version": base_version,
+        "tombstones": set(),
+        "matrix": None,
+        "chunk_ids": [],
+        "note_ids": [],
+        "snippets": [],
+        "sentences": [],
+        "sent_matrix": None,
+        "sent_ptr": _sent_ptr([]),
+        "dup_keys": [],
+    }
+
+
+def _load_delta(user_id: str, base: dict[str, Any]) -> dict[str, Any]:
+    """
+    Raises _CorruptArtifact: pending note edits would be lost, the caller should rebuild.
+    """
+    delta = _fetch(user_id, "delta")
+    if delta is not None and delta.get("base_version") == base["base_version"]:
+        return delta
+    return _empty_delta(base["base_version"])
+
+
+def _shard_bounds(n_rows: int) -> list[tuple[int, int]]:
+    """
+    Row ranges scored in parallel: about rag_shard_min_rows or more per shard,
+    at most rag_shard_workers shards. Smaller users get a single range.
+    """
+    min_rows = settings.rag_shard_min_rows
+    if settings.rag_shard_workers <= 1 or n_rows < 2 * min_rows:
+        return [(0, n_rows)]
+    n_shards = min(settings.rag_shard_workers, n_rows // min_rows)
+    size = -(-n_rows // n_shards)
+    return [(a, min(a + size, n_rows)) for a in range(0, n_rows, size)]
+
+
+def _make_shards(matrix) -> list[tuple[int, Any]]:
+    """
+    Zero-copy CSR row views (data/indices are slices of the full matrix), or [] for one shard.
+    """
+    import scipy.sparse as sp
+
+    if matrix is None:
+        return []
+    bounds = _shard_bounds(matrix.shape[0])
+    if len(bounds) == 1:
+        return []
+    shards = []
+    for a, b in bounds:
+        lo, hi = matrix.indptr[a], matrix.indptr[b]
+        view = sp.csr_matrix(
+            (matrix.data[lo:hi], matrix.indices[lo:hi], matrix.indptr[a : b + 1] - lo),
+            shape=(b - a, matrix.shape[1]),
+            copy=False,
+        )
+        shards.append((a, view))
+    return shards
+
+
+def _load_fresh(db: Session, user_id: str) -> dict[str, Any]:
+    payload = _load_base(db, user_id)
+    try:
+        payload["delta"] = _load_delta(user_id, payload)
+    except _CorruptArtifact:
+        payload = _rebuild_single_flight(db, user_id, stale_base_version=payload["base_version"])
+        payload["delta"] = _empty_delta(payload["base_version"])
+    payload["shards"] = _make_shards(payload["matrix"])
+    return payload
+
+
+# Loaded indexes per worker: user_id -> (stamp, payload, nbytes), least recently used first.
+# The stamp is the store's (base, delta) versions when the entry was loaded. Freshness:
+# - writes from this worker evict directly, other workers evict on the index-changed event
+# - the local store re-checks the stamp on every read (a stat); remote stores trust the
+#   entry and rely on events plus reconcile_index_cache() for missed ones
+_index_cache: OrderedDict[str, tuple[tuple, dict[str, Any], int]] = OrderedDict()
+_index_cache_lock = threading.Lock()
+_index_cache_bytes = 0
+
+
+def _stamp(user_id: str) -> tuple:
+    store = _store()
+    return (store.version(user_index_name(user_id)), store.version(user_delta_name(user_id)))
+
+
+def evict_cached_index(user_id: str) -> None:
+    global _index_cache_bytes
+    with _index_cache_lock:
+        old = _index_cache.pop(str(user_id), None)
+        if old is not None:
+            _index_cache_bytes -= old[2]
+
+
+def _matrix_nbytes(m) -> int:
+    if m is None:
+        return 0
+    return m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+
+
+def _payload_nbytes(payload: dict[str, Any]) -> int:
+    """
+    Rough resident size: sparse matrices, IDF vector, snippets and ids.
+    """
+    delta = payload["delta"]
+    n = _matrix_nbytes(payload["matrix"]) + _matrix_nbytes(delta["matrix"])
+    n += _matrix_nbytes(payload["sent_matrix"]) + _matrix_nbytes(delta["sent_matrix"])
+    if payload["vectorizer"] is not None:
+        n += payload["vectorizer"].nbytes
+    n += sum(len(t) + 120 for t in payload["snippets"])
+    n += sum(len(t) + 120 for t in delta["snippets"])
+    n += sum(len(x) + 60 for row in payload["sentences"] for x in row)
+    n += sum(len(x) + 60 for row in delta["sentences"] for x in row)
+    # Dedupe keys plus one LSH bucket entry per band for each group
+    n += 360 * len(payload["dup_keys"]) + 40 * len(delta["dup_keys"])
+    return n
+
+
+def _cache_put(user_id: str, stamp: tuple, payload: dict[str, Any], evict: bool = True) -> bool:
+    """
+    Cache a loaded index within rag_index_cache_max_mb.
+    evict=False only caches if it fits without pushing anything out (warm-up).
+    """
+    global _index_cache_bytes
+    size = _payload_nbytes(payload)
+    budget = settings.rag_index_cache_max_mb * 1024 * 1024
+    with _index_cache_lock:
+        old = _index_cache.get(user_id)
+        freed = old[2] if old is not None else 0
+        # Decide before touching the cache: a put that doesn't fit must not drop a hot entry
+        if size > budget or (not evict and _index_cache_bytes - freed + size > budget):
+            return False
+        if old is not None:
+            del _index_cache[user_id]
+            _index_cache_bytes -= freed
+        while _index_cache_bytes + size > budget:
+            _, (_, _, freed) = _index_cache.popitem(last=False)
+            _index_cache_bytes -= freed
+        _index_cache[user_id] = (stamp, payload, size)
+        _index_cache_bytes += size
+        return True
+
+
+def _load_index(db: Session, user_id: str) -> dict[str, Any]:
+    user_id = str(user_id)
+    check = _store().cheap_versions
+    stamp = _stamp(user_id) if check else None
+    with _index_cache_lock:
+        hit = _index_cache.get(user_id)
+        if hit is not None and (not check or hit[0] == stamp):
+            _index_cache.move_to_end(user_id)
+            return hit[1]
+
+    if stamp is None:
+        stamp = _stamp(user_id)
+
+    payload = _load_fresh(db, user_id)
+    # Stamp taken before loading: if the files changed meanwhile, the next call reloads
+    _cache_put(user_id, stamp, payload)
+    return payload
+
+
+def warm_user_index(db: Session, user_id: str) -> bool | None:
+    """
+    Load a user's published index into this worker's cache without evicting anything.
+    Returns False once the memory budget is reached, None when there is nothing to load:
+    missing, old-format or broken indexes are left to the first query (or the reindex
+    command), so a worker boot never turns into a batch of rebuilds.
+    """
+    user_id = str(user_id)
+    stamp = _stamp(user_id)
+    payload = _fetch_base(user_id)
+    if payload is None:
+        return None
+    try:
+        payload["delta"] = _load_delta(user_id, payload)
+    except _CorruptArtifact:
+        return None
+    payload["shards"] = _make_shards(payload["matrix"])
+    return _cache_put(user_id, stamp, payload, evict=False)
+
+
+def reconcile_index_cache() -> int:
+    """
+    Evict cached indexes whose published version moved on. Returns the number evicted.
+    """
+    with _index_cache_lock:
+        entries = [(user_id, entry[0]) for user_id, entry in _index_cache.items()]
+    evicted = 0
+    for user_id, stamp in entries:
+        if _stamp(user_id) != stamp:
+            evict_cached_index(user_id)
+            evicted += 1
+    return evicted
+
+
+def index_cache_stats() -> dict:
+    with _index_cache_lock:
+        return {
+            "users": len(_index_cache),
+            "bytes": _index_cache_bytes,
+            "max_bytes": settings.rag_index_cache_max_mb * 1024 * 1024,
+        }
+
+
+def apply_note_delta(db: Session, user_id: str, note_id: str) -> None:
+    """
+    Re-index one note without refitting: drop its old rows and, if it still
+    exists, append its chunks transformed with the base vectorizer.
+    Compacts into a full rebuild once the delta grows past rag_delta_max_rows.
+    """
+    user_id = str(user_id)
+    # The whole read-modify-publish runs under the writer lock, against the base that is
+    # current inside it: concurrent edits and rebuilds can't drop or orphan this delta
+    with _rebuild_lock(user_id, wait=settings.rag_rebuild_lock_seconds):
+        _apply_note_delta(db, user_id, str(note_id))
+
+
+def _apply_note_delta(db: Session, user_id: str, note_id: str) -> None:
+    import numpy as np
+    import scipy.sparse as sp
+
+    base = _load_base(db, user_id)
+    if base["vectorizer"] is None:
+        # No vocabulary to project into yet: a full build is as cheap as it gets
+        _rebuild_index_user(db, user_id)
+        return
+
+    try:
+        delta = _load_delta(user_id, base)
+    except _CorruptArtifact:
+        # Pending edits are unreadable: the full rebuild below re-indexes every note
+        delta = None
+
+    if delta is not None:
+        keep = [i for i, nid in enumerate(delta["note_ids"]) if nid != note_id]
+        matrix = delta["matrix"][keep] if delta["matrix"] is not None and keep else None
+        chunk_ids = [delta["chunk_ids"][i] for i in keep]
+        note_ids = [delta["note_ids"][i] for i in keep]
+        snippets = [delta["snippets"][i] for i in keep]
+        sentences = [delta["sentences"][i] for i in keep]
+        ptr = delta["sent_ptr"]
+        sent_keep = np.concatenate([np.arange(ptr[i], ptr[i + 1]) for i in keep] or [np.zeros(0, dtype=np.int64)])
+        sent_matrix = delta["sent_matrix"][sent_keep] if delta["sent_matrix"] is not None and len(sent_keep) else None
+        dup_keys = [delta["dup_keys"][i] for i in keep]
+
+        # Hides this note's rows in the base, whether it was updated or deleted
+        tombstones = set(delta["tombstones"])
+        tombstones.add(note_id)
+
+        note = db.get(Note, note_id)
+        if note is not None and str(note.owner_id) == user_id:
+            texts = note_chunks(note.title, note.content)
+            if texts:
+                vecs = base["vectorizer"].transform(texts)
+                matrix = vecs if matrix is None else sp.vstack([matrix, vecs], format="csr")
+                chunk_ids += [_note_key(note_id, i) for i in range(len(texts))]
+                note_ids += [note_id] * len(texts)
+                snippets += [_snippet(t) for t in texts]
+                new_sentences, new_sent_matrix, _ = _sentence_vectors(base["vectorizer"], texts)
+                sentences += new_sentences
+                if new_sent_matrix is not None:
+                    sent_matrix = new_sent_matrix if sent_matrix is None else sp.vstack([sent_matrix, new_sent_matrix], format="csr")
+                for t in texts:
+                    sig = simhash(t)
+                    rep = base["lsh"].find(sig)
+                    dup_keys.append(rep[0] if rep is not None else sig)
+
+        if len(chunk_ids) <= settings.rag_delta_max_rows and len(tombstones) <= settings.rag_delta_max_rows:
+            _publish(
+                user_id,
+                "delta",
+                {
+                    "base_version": base["base_version"],
+                    "tombstones": tombstones,
+                    "matrix": matrix,
+                    "chunk_ids": chunk_ids,
+                    "note_ids": note_ids,
+                    "snippets": snippets,
+                    "sentences": sentences,
+                    "sent_matrix": sent_matrix,
+                    "sent_ptr": _sent_ptr(sentences),
+                    "dup_keys": dup_keys,
+                },
+            )
+            evict_cached_index(user_id)
+            notify_index_changed(user_id)
+            return
+
+    _rebuild_index_user(db, user_id)
+
+
+_shard_pool: ThreadPoolExecutor | None = None
+
+
+def _get_shard_pool() -> ThreadPoolExecutor:
+    global _shard_pool
+    with _user_locks_guard:
+        if _shard_pool is None:
+            _shard_pool = ThreadPoolExecutor(max_workers=settings.rag_shard_workers, thread_name_prefix="rag-shard")
+        return _shard_pool
+
+
+def _score_shards(q_vec, shards: list[tuple[int, Any]], n: int, dead: set[int] | None) -> list[tuple[float, int]]:
+    """
+    Score row shards on the pool (scipy's sparse product releases the GIL) and
+    k-way merge each shard's sorted top-n.
+    Rows and queries are L2-normalized by _HashedTfidf._weigh, so the dot product is the cosine.
+    """
+    import numpy as np
+
+    q_t = q_vec.T.tocsc()
+
+    def top(shard: tuple[int, Any]) -> list[tuple[float, int]]:
+        start, m = shard
+        sims = (m @ q_t).toarray().ravel()
+        if dead:
+            local = [r - start for r in dead if start <= r < start + m.shape[0]]
+            sims[local] = -np.inf
+        k = min(n, sims.shape[0])
+        best = np.argpartition(-sims, k - 1)[:k]
+        best = best[np.argsort(-sims[best])]
+        return [(float(sims[i]), start + int(i)) for i in best if sims[i] != -np.inf]
+
+    parts = list(_get_shard_pool().map(top, shards))
+    return list(islice(heapq.merge(*parts, key=lambda x: -x[0]), n))
+
+
+def _score(
+    q_vec,
+    matrix,
+    rows: list[int] | None,
+    n: int,
+    dead: set[int] | None = None,
+    shards: list[tuple[int, Any]] | None = None,
+) -> list[tuple[float, int]]:
+    """
+    Top-n (score, row) pairs for q_vec against matrix.
+    rows limits scoring to a subset; dead rows are never returned.
+    shards (large users only) switches full scans to the parallel path.
+    """
+    import numpy as np
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    if matrix is None:
+        return []
+    if rows is not None:
+        if dead:
+            rows = [r for r in rows if r not in dead]
+        if not rows:
+            return []
+        sims = cosine_similarity(q_vec, matrix[rows]).flatten()
+        order = np.argsort(-sims)[:n]
+        return [(float(sims[i]), rows[i]) for i in order]
+
+    if shards:
+        return _score_shards(q_vec, shards, n, dead)
+
+    sims = cosine_similarity(q_vec, matrix).flatten()
+    if dead:
+        sims[list(dead)] = -np.inf
+    order = np.argsort(-sims)[:n]
+    return [(float(sims[i]), int(i)) for i in order if sims[i] != -np.inf]
 
 
 def query_index_user(
@@ -104,19 +853,29 @@ def query_index_user(
     top_k: int = 5,
     candidate_chunk_ids: list[str] | None = None,
     dedupe: bool = True,
+    candidate_note_ids: list[str] | None = None,
 ) -> list[Citation]:
     """
     TF-IDF cosine similarity search.
     Day 4: If candidate_chunk_ids provided, restrict similarity to those rows (hybrid-ish retrieval).
-    Day 4: Deduplicate near-identical citations (by snippet hash) to avoid repeats.
+    Day 4: Deduplicate near-identical citations to avoid repeats (by the rows' precomputed SimHash group keys).
+    Scores the base index and the pending note delta, then merges them.
     """
-    payload = _load_index(db, user_id)
+    try:
+        payload = _load_index(db, user_id)
+    except IndexUnavailable:
+        # Another request is still rebuilding this index: answer with no citations
+        logger.warning("rag index unavailable user_id=%s", user_id)
+        return []
 
     vectorizer = payload["vectorizer"]
     matrix = payload["matrix"]
     chunk_ids: list[str] = payload["chunk_ids"]
-    doc_ids: list[str] = payload["doc_ids"]
+    doc_ids: list[str | None] = payload["doc_ids"]
+    note_ids: list[str | None] = payload["note_ids"]
+    snippets: list[str] = payload["snippets"]
     id_to_row: dict[str, int] = payload.get("id_to_row", {})
+    delta = payload["delta"]
 
     if vectorizer is None or matrix is None or not chunk_ids:
         return []
@@ -124,48 +883,131 @@ def query_index_user(
     q_vec = vectorizer.transform([question])
 
     k = max(1, min(int(top_k), 20))
+    n = max(k * 3, 20)
+
+    # Base rows of notes that were edited or deleted since the last rebuild
+    note_rows: dict[str, list[int]] = payload["note_rows"]
+    dead = {r for nid in delta["tombstones"] for r in note_rows.get(nid, ())}
 
     # Candidate slicing: choose subset of row indices
-    if candidate_chunk_ids:
-        rows = [id_to_row.get(cid) for cid in candidate_chunk_ids]
-        rows = [r for r in rows if r is not None]
-    else:
-        rows = None
-
-    if rows:
-        sub_matrix = matrix[rows]
-        sims = cosine_similarity(q_vec, sub_matrix).flatten()
-        # Map back to global row index
-        ranked = sorted(zip(rows, sims), key=lambda x: x[1], reverse=True)[: max(k * 3, 20)]
-        global_rows = [r for r, _ in ranked]
-        global_scores = [float(s) for _, s in ranked]
-    else:
-        sims = cosine_similarity(q_vec, matrix).flatten()
-        global_rows = np.argsort(-sims)[: max(k * 3, 20)].tolist()
-        global_scores = [float(sims[i]) for i in global_rows]
+    base_rows: list[int] | None = None
+    delta_rows: list[int] | None = None
+    if candidate_chunk_ids or candidate_note_ids:
+        wanted_notes = set(candidate_note_ids or [])
+        # Collapsed near-duplicate chunks map onto the same row
+        base_rows = list({id_to_row[cid] for cid in (candidate_chunk_ids or []) if cid in id_to_row})
+        base_rows += [r for nid in wanted_notes for r in note_rows.get(nid, ())]
+        delta_rows = [i for i, nid in enumerate(delta["note_ids"]) if nid in wanted_notes]
+        if not base_rows and not delta_rows:
+            base_rows = delta_rows = None
+
+    ranked = [(s, "base", r) for s, r in _score(q_vec, matrix, base_rows, n, dead, payload.get("shards"))]
+    ranked += [(s, "delta", r) for s, r in _score(q_vec, delta["matrix"], delta_rows, n)]
+    ranked.sort(key=lambda x: x[0], reverse=True)
 
     citations: list[Citation] = []
     seen = set()
 
-    for row, score in zip(global_rows, global_scores):
-        cid = chunk_ids[row]
-        did = doc_ids[row]
-
-        chunk = db.get(Chunk, cid)
-        if not chunk:
-            continue
-
-        snip = _snippet(chunk.text)
+    for score, source, row in ranked[:n]:
+        if source == "base":
+            cid, did, nid, snip = chunk_ids[row], doc_ids[row], note_ids[row], snippets[row]
+            key = payload["dup_keys"][row]
+        else:
+            cid, did, nid, snip = None, None, delta["note_ids"][row], delta["snippets"][row]
+            key = delta["dup_keys"][row]
 
         if dedupe:
-            # Deduplicate by hash of normalized snippet prefix
-            h = hashlib.sha256(snip.lower().encode("utf-8")).hexdigest()[:16]
-            if h in seen:
+            if key in seen:
                 continue
-            seen.add(h)
-
-        citations.append(Citation(chunk_id=cid, document_id=did, score=score, snippet=snip))
+            seen.add(key)
+
+        citations.append(Citation(
+            chunk_id=None if nid is not None else cid,
+            document_id=did,
+            score=score,
+            snippet=snip,
+            note_id=nid,
+            row=(payload, payload if source == "base" else delta, row),
+        ))
         if len(citations) >= k:
             break
 
     return citations
+
+
+def extract_answer(question: str, citations: list[Citation], max_chunks: int = 3) -> str | None:
+    """
+    Best-matching sentence among the top citations' chunks, scored in one sparse
+    product over their precomputed sentence vectors.
+    Reads the index the citations were scored against (kept on them by query_index_user),
+    so a concurrent delta or rebuild can't shift their rows.
+    - A very short best sentence is extended with the one after it
+    - None if the citations don't all come from one loaded index
+    """
+    import numpy as np
+    import scipy.sparse as sp
+
+    if not citations or citations[0].row is None:
+        return None
+    payload = citations[0].row[0]
+    if payload["vectorizer"] is None:
+        return None
+
+    picked: list[tuple[dict[str, Any], int, int]] = []  # (source payload, row, sentence row)
+    blocks = []
+    for c in citations[:max_chunks]:
+        if c.row is None or c.row[0] is not payload:
+            return None
+        _, src, row = c.row
+        ptr = src["sent_ptr"]
+        if not 0 <= row < len(ptr) - 1:
+            continue
+        a, b = int(ptr[row]), int(ptr[row + 1])
+        if a == b:
+            continue
+        blocks.append(src["sent_matrix"][a:b])
+        picked += [(src, row, j) for j in range(a, b)]
+    if not picked:
+        return None
+
+    q_t = payload["vectorizer"].transform([question]).T.tocsc()
+    sims = (sp.vstack(blocks, format="csr") @ q_t).toarray().ravel()
+    # argmax keeps the earliest maximum, i.e. prefers higher-ranked citations on ties
+    best = int(np.argmax(sims))
+    src, row, j = picked[best]
+    local = j - int(src["sent_ptr"][row])
+    sentences = src["sentences"][row]
+    answer = sentences[local]
+    if len(answer) < 80 and local + 1 < len(sentences):
+        answer = f"{answer} {sentences[local + 1]}"
+    return answer
+
+
+def near_duplicate_chunks(user_id: str, new_ids: list[str], signatures: list[int]) -> list[str | None]:
+    """
+    For each new chunk (about to be inserted, in order): the id of an existing document
+    chunk, or of an earlier new one, that it near-duplicates.
+    Checked against the LSH table published with the user's index (not the index itself);
+    a user without one only gets in-list matches.
+    """
+    try:
+        payload = _fetch(str(user_id), "lsh")
+    except Exception:
+        logger.warning("near-duplicate check without index user_id=%s", user_id)
+        payload = None
+
+    # A fresh copy from the store, so adding this upload's chunks changes nothing shared
+    lsh = LSHTable()
+    if payload is not None and payload.get("format") == INDEX_FORMAT:
+        lsh = payload["lsh"]
+
+    out: list[str | None] = []
+    for i, sig in enumerate(signatures):
+        rep = lsh.find(sig)
+        if rep is None:
+            out.append(None)
+            lsh.add(sig, (sig, new_ids[i]))
+        else:
+            # Note groups have no chunk id to point at
+            out.append(rep[1])
+    return out
@@ -0,0 +1,198 @@
+# Bulk rebuild of per-user RAG indexes, e.g. after an INDEX_FORMAT or vectorizer change.
+# - users come from ready documents and notes; by default only those whose published
+#   index is missing or has an older format
+# - rebuilds run in a process pool, started at most RAG_REINDEX_USERS_PER_SECOND
+# - every finished user is appended to a JSONL checkpoint, so an interrupted run resumes
+# Each rebuild publishes through the manifest swap: old indexes keep serving until then.
+#     python -m app.services.reindex --workers 4
+#     python -m app.services.reindex --all --reset
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable
+
+from sqlalchemy import select, union
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.document import Document
+from app.models.note import Note
+
+logger = logging.getLogger(__name__)
+
+
+def indexed_user_ids(db: Session) -> list[str]:
+    """
+    Owners of at least one ready document or note.
+    """
+    stmt = union(
+        select(Document.owner_id).where(Document.status == "ready"),
+        select(Note.owner_id),
+    )
+    return sorted(str(uid) for uid in db.scalars(stmt))
+
+
+def is_stale(user_id: str) -> bool:
+    from app.services.rag_index import INDEX_FORMAT, _CorruptArtifact, _read_manifest
+
+    try:
+        manifest = _read_manifest(user_id, "index")
+    except _CorruptArtifact:
+        return True
+    return manifest is None or manifest.get("format") != INDEX_FORMAT
+
+
+def read_checkpoint(path: Path) -> set[str]:
+    """
+    Users rebuilt successfully at the current INDEX_FORMAT.
+    """
+    from app.services.rag_index import INDEX_FORMAT
+
+    done: set[str] = set()
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        return done
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            # A run killed mid-write leaves a partial last line
+            continue
+        if entry.get("error") is None and entry.get("format") == INDEX_FORMAT:
+            done.add(entry["user_id"])
+    return done
+
+
+def rebuild_one(user_id: str) -> dict:
+    """
+    Rebuild one user's index in this process; never raises.
+    """
+    from app.db.session import SessionLocal
+    from app.services.rag_index import INDEX_FORMAT, _read_manifest, rebuild_index_user
+
+    t0 = time.perf_counter()
+    entry = {"user_id": user_id, "format": INDEX_FORMAT, "seconds": None, "bytes": None, "error": None}
+    try:
+        with SessionLocal() as db:
+            rebuild_index_user(db, user_id)
+        manifest = _read_manifest(user_id, "index")
+        entry["bytes"] = manifest["size"] if manifest else None
+    except Exception as e:
+        entry["error"] = f"{type(e).__name__}: {e}"[:500]
+    entry["seconds"] = round(time.perf_counter() - t0, 3)
+    return entry
+
+
+def run_reindex(
+    user_ids: Iterable[str],
+    checkpoint: Path,
+    workers: int,
+    users_per_second: float,
+    rebuild: Callable[[str], dict] = rebuild_one,
+) -> dict:
+    """
+    Rebuild user_ids not yet in the checkpoint. workers <= 1 runs inline.
+    Returns a summary; per-user results are logged and appended to the checkpoint.
+    """
+    done = read_checkpoint(checkpoint)
+    user_ids = list(user_ids)
+    todo = [u for u in user_ids if u not in done]
+    # Only the requested users: the checkpoint may also list users outside this run
+    skipped = len(user_ids) - len(todo)
+    summary = {"skipped": skipped, "rebuilt": 0, "failed": 0, "bytes": 0, "seconds": []}
+    logger.info("reindex: %d users to rebuild, %d already done", len(todo), skipped)
+
+    checkpoint.parent.mkdir(parents=True, exist_ok=True)
+    interval = 1.0 / users_per_second if users_per_second > 0 else 0.0
+
+    with checkpoint.open("ab+") as f:
+        # Terminate a partial last line so the next entry isn't glued to it
+        if f.tell() > 0:
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    with checkpoint.open("a") as out:
+
+        def record(entry: dict) -> None:
+            out.write(json.dumps(entry) + "\n")
+            out.flush()
+            if entry["error"]:
+                summary["failed"] += 1
+                logger.error("reindex user=%s failed after %.3fs: %s", entry["user_id"], entry["seconds"], entry["error"])
+            else:
+                summary["rebuilt"] += 1
+                summary["bytes"] += entry["bytes"] or 0
+                summary["seconds"].append(entry["seconds"])
+                logger.info("reindex user=%s %.3fs %s bytes", entry["user_id"], entry["seconds"], entry["bytes"])
+
+        next_start = time.monotonic()
+
+        def pace() -> None:
+            # Throttles DB reads: each rebuild starts with one burst of chunk/note selects
+            nonlocal next_start
+            delay = next_start - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            next_start = max(next_start, time.monotonic()) + interval
+
+        if workers <= 1:
+            for user_id in todo:
+                pace()
+                record(rebuild(user_id))
+        else:
+            # spawn: children get their own engine instead of sharing forked connections
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+                pending: set[Future] = set()
+                for user_id in todo:
+                    if len(pending) >= workers:
+                        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for f in finished:
+                            record(f.result())
+                    pace()
+                    pending.add(pool.submit(rebuild, user_id))
+                for f in wait(pending).done:
+                    record(f.result())
+
+    times = sorted(summary.pop("seconds"))
+    summary["p50_seconds"] = times[len(times) // 2] if times else None
+    summary["max_seconds"] = times[-1] if times else None
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    from app.db.session import SessionLocal
+    from app.services.rag_index import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Rebuild per-user RAG indexes")
+    parser.add_argument("--workers", type=int, default=settings.rag_reindex_workers)
+    parser.add_argument("--users-per-second", type=float, default=settings.rag_reindex_users_per_second)
+    parser.add_argument("--checkpoint", type=Path, default=DATA_DIR / "reindex-checkpoint.jsonl")
+    parser.add_argument("--all", action="store_true", help="rebuild current-format indexes too")
+    parser.add_argument("--reset", action="store_true", help="ignore and clear the checkpoint")
+    parser.add_argument("--user", action="append", dest="users", help="only these users (repeatable)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.reset:
+        args.checkpoint.unlink(missing_ok=True)
+
+    if args.users:
+        user_ids = args.users
+    else:
+        with SessionLocal() as db:
+            user_ids = indexed_user_ids(db)
+    if not args.all:
+        user_ids = [u for u in user_ids if is_stale(u)]
+
+    summary = run_reindex(user_ids, args.checkpoint, args.workers, args.users_per_second)
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Throughput of the middleware stack: BaseHTTPMiddleware (previous) vs pure ASGI.
+Runs in-process over httpx.ASGITransport; auth, DB, Redis and the index are stubbed
+so the numbers reflect framework + middleware overhead only.
+Run from the repo root: python -m tests.bench_middleware
+"""
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.api import deps, rate_limit
+from app.api.routes import health_router, rag as rag_routes
+from app.core.rate_limiter import RateLimitResult
+from app.db.session import get_db
+from app.middleware.request_id import RequestIDMiddleware
+from app.middleware.security_headers import SecurityHeadersMiddleware
+from app.services.rag_index import Citation
+
+REQUESTS = 3000
+CONCURRENCY = 32
+
+
+class LegacyRequestID(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        rid = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        request.state.request_id = rid
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = rid
+        return response
+
+
+class LegacySecurityHeaders(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["Content-Security-Policy"] = "default-src 'none'; frame-ancestors 'none';"
+        return response
+
+
+class _Empty(list):
+    def all(self):
+        return list(self)
+
+
+class _Session:
+    def scalars(self, stmt):
+        return _Empty()
+
+
+def build(request_id_mw, headers_mw) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(request_id_mw)
+    app.add_middleware(headers_mw)
+    app.include_router(health_router, prefix="/v1")
+    app.include_router(rag_routes.router, prefix="/v1")
+    user = SimpleNamespace(id=uuid.uuid4(), role="user", is_active=True)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: _Session()
+    return app
+
+
+def stub_backends():
+    citations = [Citation(chunk_id=str(uuid.uuid4()), document_id=str(uuid.uuid4()), score=0.9 - i / 10, snippet="x" * 200) for i in range(5)]
+    rate_limit.check_rate_limit = lambda **kw: RateLimitResult(allowed=True, remaining=1, retry_after=0)
+    rag_routes.query_index_user = lambda *a, **kw: citations
+    rag_routes.extract_keywords = lambda *a, **kw: []
+    rag_routes.audit = lambda *a, **kw: None
+
+
+async def run(app: FastAPI, method: str, path: str, **kw) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        sem = asyncio.Semaphore(CONCURRENCY)
+
+        async def one():
+            async with sem:
+                r = await client.request(method, path, **kw)
+                assert r.status_code == 200, r.text
+
+        await one()  # warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(REQUESTS)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+def main():
+    stub_backends()
+    legacy = build(LegacyRequestID, LegacySecurityHeaders)
+    current = build(RequestIDMiddleware, SecurityHeadersMiddleware)
+    cases = [
+        ("GET /v1/health", "GET", "/v1/health", {}),
+        ("POST /v1/rag/query", "POST", "/v1/rag/query", {"json": {"question": "who is the narrator", "top_k": 5}}),
+    ]
+    for name, method, path, kw in cases:
+        before = asyncio.run(run(legacy, method, path, **kw))
+        after = asyncio.run(run(current, method, path, **kw))
+        print(f"{name:<20} BaseHTTPMiddleware {before:8.0f} req/s   pure ASGI {after:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Offline benchmark for chunk_text, rebuild_index_user and query_index_user.
+Each corpus size runs in a fresh process so peak RSS is per size. Results are JSON,
+so two commits can be diffed directly.
+
+Run from the repo root:
+    python -m tests.bench_rag --sizes 1000,10000,100000 --out bench.json
+    python -m tests.bench_rag --sizes 1000000 --chunk-chars 600      # 1M chunks, ~0.6 GB of text
+    python -m tests.bench_rag --postgres --sizes 10000              # seeded local Postgres (DATABASE_URL)
+"""
+import argparse
+import json
+import multiprocessing as mp
+import platform
+import random
+import resource
+import subprocess
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+QUERIES = 200
+CANDIDATES = 2000
+VOCAB = 20000
+
+
+def _vocab(rng: random.Random) -> list[str]:
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(VOCAB)]
+
+
+def synthetic_chunks(n: int, chunk_chars: int, seed: int = 7) -> list[str]:
+    """
+    Zipf-ish word distribution, sentences of 8-20 words, about chunk_chars per chunk.
+    """
+    rng = random.Random(seed)
+    vocab = _vocab(rng)
+    cum, total = [], 0.0
+    for i in range(VOCAB):
+        total += 1 / (i + 1)
+        cum.append(total)
+    words_per_chunk = max(8, chunk_chars // 7)
+    out = []
+    for _ in range(n):
+        words = rng.choices(vocab, cum_weights=cum, k=words_per_chunk)
+        sentences, i = [], 0
+        while i < len(words):
+            step = rng.randint(8, 20)
+            sentences.append(" ".join(words[i : i + step]).capitalize() + ".")
+            i += step
+        out.append(" ".join(sentences))
+    return out
+
+
+def _percentiles(samples: list[float]) -> dict:
+    s = sorted(samples)
+
+    def pct(p):
+        return round(s[min(len(s) - 1, int(p / 100 * len(s)))] * 1000, 3)
+
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "qps": round(len(s) / sum(s), 1)}
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class BenchSession:
+    """
+    DB stand-in for rag_index: returns the synthetic chunks, no notes.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def scalars(self, stmt):
+        return SimpleNamespace(all=lambda: self.chunks)
+
+    def execute(self, stmt):
+        return SimpleNamespace(all=lambda: [])
+
+    def get(self, model, key):
+        return None
+
+
+def seed_postgres(db, n_chunks: int, chunks_per_doc: int = 50, texts: list[str] | None = None) -> str:
+    """
+    Bulk-insert one benchmark user owning n_chunks chunks. Returns the user id.
+    Uses executemany inserts in batches; rows are tagged bench-*@example.com for cleanup.
+    """
+    from sqlalchemy import insert
+
+    from app.models.chunk import Chunk
+    from app.models.document import Document
+    from app.models.user import User
+
+    texts = texts or synthetic_chunks(n_chunks, 1800)
+    user_id = uuid.uuid4()
+    db.execute(insert(User), [{"id": user_id, "email": f"bench-{user_id}@example.com", "role": "user", "is_active": True}])
+
+    n_docs = (n_chunks + chunks_per_doc - 1) // chunks_per_doc
+    doc_ids = [uuid.uuid4() for _ in range(n_docs)]
+    db.execute(
+        insert(Document),
+        [{"id": d, "owner_id": user_id, "filename": f"bench-{i}.txt", "status": "ready", "num_chunks": chunks_per_doc} for i, d in enumerate(doc_ids)],
+    )
+    batch = []
+    for i, text in enumerate(texts):
+        batch.append({"id": uuid.uuid4(), "document_id": doc_ids[i // chunks_per_doc], "owner_id": user_id, "chunk_index": i % chunks_per_doc, "text": text})
+        if len(batch) >= 10000:
+            db.execute(insert(Chunk), batch)
+            batch = []
+    if batch:
+        db.execute(insert(Chunk), batch)
+    db.commit()
+    return str(user_id)
+
+
+def run_size(n: int, chunk_chars: int, postgres: bool) -> dict:
+    from app.services import rag_index
+    from app.services.chunking import chunk_text
+
+    rag_index.DATA_DIR = Path(tempfile.mkdtemp(prefix="bench_rag_"))
+    rng = random.Random(n)
+    result: dict = {"n_chunks": n, "chunk_chars": chunk_chars, "backend": "postgres" if postgres else "stand-in"}
+
+    t = time.perf_counter()
+    texts = synthetic_chunks(n, chunk_chars)
+    result["generate_seconds"] = round(time.perf_counter() - t, 3)
+
+    # chunk_text over the corpus re-joined into documents of 50 paragraphs (capped at 10k chunks of text)
+    sample = texts[:10000]
+    docs = ["\n\n".join(sample[i : i + 50]) for i in range(0, len(sample), 50)]
+    t = time.perf_counter()
+    produced = sum(len(chunk_text(d)) for d in docs)
+    dt = time.perf_counter() - t
+    mb = sum(len(d) for d in docs) / 1e6
+    result["chunk_text"] = {"input_mb": round(mb, 2), "chunks": produced, "mb_per_s": round(mb / dt, 2), "chunks_per_s": round(produced / dt, 1)}
+
+    if postgres:
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        t = time.perf_counter()
+        user_id = seed_postgres(db, n, texts=texts)
+        result["seed_seconds"] = round(time.perf_counter() - t, 3)
+    else:
+        user_id = str(uuid.uuid4())
+        doc_id = uuid.uuid4()
+        db = BenchSession([SimpleNamespace(id=uuid.uuid4(), document_id=doc_id, text=x, meta_data=None) for x in texts])
+    del texts
+
+    t = time.perf_counter()
+    rag_index.rebuild_index_user(db, user_id)
+    dt = time.perf_counter() - t
+    size = rag_index._read_manifest(user_id, "index")["size"]
+    result["build"] = {"seconds": round(dt, 3), "chunks_per_s": round(n / dt, 1), "index_bytes": size}
+
+    rag_index.evict_cached_index(user_id)
+    t = time.perf_counter()
+    payload = rag_index._load_index(db, user_id)
+    result["load_seconds"] = round(time.perf_counter() - t, 3)
+
+    chunk_ids = payload["chunk_ids"]
+    questions = [" ".join(rng.sample(payload["snippets"][rng.randrange(n)].split(), 4)) for _ in range(QUERIES)]
+
+    def timed(**kw):
+        samples = []
+        for q in questions:
+            t = time.perf_counter()
+            rag_index.query_index_user(db, user_id, q, top_k=5, **kw)
+            samples.append(time.perf_counter() - t)
+        return _percentiles(samples)
+
+    result["query_full"] = timed()
+    result["query_candidates"] = timed(candidate_chunk_ids=rng.sample(chunk_ids, min(CANDIDATES, len(chunk_ids))))
+    result["peak_rss_mb"] = _peak_rss_mb()
+
+    if postgres:
+        db.close()
+    return result
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--chunk-chars", type=int, default=1800)
+    parser.add_argument("--postgres", action="store_true", help="seed and read chunks from DATABASE_URL instead of the stand-in")
+    parser.add_argument("--out", help="write JSON here as well as to stdout")
+    args = parser.parse_args()
+
+    results = []
+    ctx = mp.get_context("spawn")
+    for n in (int(x) for x in args.sizes.split(",")):
+        with ctx.Pool(1) as pool:
+            results.append(pool.apply(run_size, (n, args.chunk_chars, args.postgres)))
+
+    report = {"commit": _git_rev(), "python": platform.python_version(), "machine": platform.machine(), "results": results}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        Path(args.out).write_text(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-request serialization cost, old path vs typed response models.
+Run from the repo root: python -m tests.bench_serialization
+"""
+import timeit
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from app.schemas.note import NoteOut, NotePage
+from app.schemas.rag import RagCitation, RagQueryResponse
+from app.services.rag_index import Citation
+
+N = 2000
+
+now = datetime.now(timezone.utc)
+owner = uuid.uuid4()
+# Stand-ins for ORM rows: pydantic reads them through from_attributes either way
+notes = [
+    SimpleNamespace(id=uuid.uuid4(), owner_id=owner, title=f"note {i}", content="lorem ipsum " * 40, created_at=now, updated_at=None)
+    for i in range(100)
+]
+citations = [
+    Citation(chunk_id=str(uuid.uuid4()), document_id=str(uuid.uuid4()), score=0.5 - i / 100, snippet="dolor sit amet " * 15)
+    for i in range(20)
+]
+
+# What FastAPI does with the returned value: validate against response_model, then dump JSON bytes
+as_dict = TypeAdapter(dict)
+as_note_page = TypeAdapter(NotePage)
+as_rag = TypeAdapter(RagQueryResponse)
+
+
+def notes_before():
+    body = {"items": [NoteOut.model_validate(n).model_dump() for n in notes], "limit": 100, "next_cursor": None, "total": None}
+    return as_dict.dump_json(as_dict.validate_python(body))
+
+
+def notes_after():
+    body = {"items": notes, "limit": 100, "next_cursor": None, "total": None}
+    return as_note_page.dump_json(as_note_page.validate_python(body))
+
+
+def rag_before():
+    out = [
+        RagCitation(chunk_id=c.chunk_id, document_id=c.document_id, score=c.score, snippet=c.snippet, note_id=c.note_id)
+        for c in citations
+    ]
+    return as_rag.dump_json(as_rag.validate_python(RagQueryResponse(answer="x", citations=out)))
+
+
+def rag_after():
+    return as_rag.dump_json(as_rag.validate_python({"answer": "x", "citations": citations}))
+
+
+def report(name, fn):
+    us = min(timeit.repeat(fn, number=N, repeat=5)) / N * 1e6
+    print(f"{name:<28} {us:8.1f} us/request")
+
+
+def main():
+    report("notes page (100) before", notes_before)
+    report("notes page (100) after", notes_after)
+    report("rag query (20) before", rag_before)
+    report("rag query (20) after", rag_after)
+
+
+if __name__ == "__main__":
+    main()
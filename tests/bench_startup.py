@@ -0,0 +1,34 @@
+"""
+Worker boot report: import cost of app.main and of the first RAG call.
+Run from the repo root: python -m tests.bench_startup
+"""
+import subprocess
+import sys
+
+from tests.test_startup import importtime
+
+TOP = 15
+
+
+def main():
+    times = importtime("app.main")
+    print(f"import app.main: {times['app.main'] / 1000:.0f} ms")
+    print("slowest top-level imports (cumulative):")
+    roots = {name: us for name, us in times.items() if "." not in name}
+    for name, us in sorted(roots.items(), key=lambda x: -x[1])[:TOP]:
+        print(f"  {name:<32} {us / 1000:8.1f} ms")
+
+    # Paid once per worker, on the first RAG query or index rebuild
+    rag = importtime("app.services.rag_index, sklearn.feature_extraction.text, sklearn.metrics.pairwise, scipy.sparse, joblib")
+    deferred = sum(us for name, us in rag.items() if name in ("sklearn", "scipy", "numpy", "joblib"))
+    print(f"deferred ML stack (first RAG use): {deferred / 1000:.0f} ms")
+
+    rss = subprocess.run(
+        [sys.executable, "-c", "import resource, app.main; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"],
+        capture_output=True, text=True, check=True,
+    ).stdout.strip()
+    print(f"max RSS after import app.main: {int(rss) / 1024:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+EXPLAIN evidence for the per-user chunk scans, before and after chunks.owner_id.
+Runs both query shapes against DATABASE_URL (migrated to head) for one user and
+prints their plans with timings and buffer counts.
+
+Run from the repo root:
+    python -m tests.explain_chunks --seed 100000          # seed a bench user with 100k chunks first
+    python -m tests.explain_chunks --user <user-uuid>
+"""
+import argparse
+
+from sqlalchemy import text
+
+QUERIES = {
+    "rebuild, join (before)": """
+        SELECT c.* FROM chunks c JOIN documents d ON c.document_id = d.id
+        WHERE d.owner_id = :uid ORDER BY c.created_at ASC
+    """,
+    "rebuild, owner_id (after)": """
+        SELECT c.* FROM chunks c
+        WHERE c.owner_id = :uid ORDER BY c.created_at ASC
+    """,
+    "candidates, join (before)": """
+        SELECT c.id FROM chunks c JOIN documents d ON c.document_id = d.id
+        WHERE d.owner_id = :uid AND (c.text ILIKE '%whale%' OR c.text ILIKE '%ship%') LIMIT 2000
+    """,
+    "candidates, owner_id (after)": """
+        SELECT c.id FROM chunks c
+        WHERE c.owner_id = :uid AND (c.text ILIKE '%whale%' OR c.text ILIKE '%ship%') LIMIT 2000
+    """,
+}
+
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="existing user id to explain for")
+    parser.add_argument("--seed", type=int, default=0, help="seed a bench user with this many chunks")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user_id = args.user
+        if args.seed:
+            from tests.bench_rag import seed_postgres
+
+            user_id = seed_postgres(db, args.seed)
+            db.execute(text("ANALYZE chunks"))
+            db.execute(text("ANALYZE documents"))
+            db.commit()
+        if not user_id:
+            parser.error("pass --user or --seed")
+
+        for name, sql in QUERIES.items():
+            plan = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), {"uid": user_id}).scalars().all()
+            print(f"== {name}")
+            print("\n".join(plan))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Concurrent load generator and retrieval-quality evaluator for /v1/rag/query.
+
+Replays a labeled query set (JSONL) at a fixed concurrency and reports latency
+percentiles, throughput, error/429 rates and recall@k, MRR and abstain rate.
+Each line: {"question": ..., plus any of
+  "gold_chunk_ids": [...], "gold_document_ids": [...], "gold_note_ids": [...],
+  "gold_snippet_contains": [...]}   (case-insensitive substrings, for id-free labels)
+
+Run from the repo root against a running API:
+    TOKEN=... python -m tests.load_eval --requests 500 --concurrency 16
+    python -m tests.load_eval --tokens-file tokens.txt --json > eval.json
+rag_query is rate limited per user (60/min); spread load over several users' tokens
+with --tokens-file, otherwise most requests past the first minute come back 429.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+import httpx
+
+DEFAULT_QUERIES = Path(__file__).with_name("eval_queries.jsonl")
+
+
+def load_queries(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def is_relevant(citation: dict, q: dict) -> bool:
+    if citation.get("chunk_id") and citation["chunk_id"] in q.get("gold_chunk_ids", ()):
+        return True
+    if citation.get("document_id") and citation["document_id"] in q.get("gold_document_ids", ()):
+        return True
+    if citation.get("note_id") and citation["note_id"] in q.get("gold_note_ids", ()):
+        return True
+    snippet = (citation.get("snippet") or "").lower()
+    return any(s.lower() in snippet for s in q.get("gold_snippet_contains", ()))
+
+
+def score_response(citations: list[dict], q: dict, k: int) -> tuple[float, float]:
+    """
+    (recall@k, reciprocal rank). Id labels count distinct gold ids found;
+    substring labels count a hit as full recall.
+    """
+    top = citations[:k]
+    rr = next((1.0 / (i + 1) for i, c in enumerate(top) if is_relevant(c, q)), 0.0)
+
+    gold = set(q.get("gold_chunk_ids", ())) | set(q.get("gold_document_ids", ())) | set(q.get("gold_note_ids", ()))
+    if gold:
+        found = {c.get(f) for c in top for f in ("chunk_id", "document_id", "note_id")} & gold
+        return len(found) / len(gold), rr
+    return (1.0 if rr > 0 else 0.0), rr
+
+
+def percentile(sorted_samples: list[float], p: float) -> float | None:
+    if not sorted_samples:
+        return None
+    return round(sorted_samples[min(len(sorted_samples) - 1, int(p / 100 * len(sorted_samples)))] * 1000, 2)
+
+
+async def run(api: str, tokens: list[str], queries: list[dict], total: int, concurrency: int, top_k: int) -> dict:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    errors = 0
+    recalls: list[float] = []
+    rrs: list[float] = []
+    abstained = 0
+    scored = 0
+
+    jobs = itertools.islice(zip(itertools.cycle(queries), itertools.cycle(tokens)), total)
+    job_lock = asyncio.Lock()
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors, abstained, scored
+        while True:
+            async with job_lock:
+                job = next(jobs, None)
+            if job is None:
+                return
+            q, token = job
+            t = time.perf_counter()
+            try:
+                r = await client.post(
+                    f"{api}/v1/rag/query",
+                    headers={"Authorization": f"Bearer {token}"},
+                    json={"question": q["question"], "top_k": top_k},
+                )
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t)
+            statuses[r.status_code] = statuses.get(r.status_code, 0) + 1
+            if r.status_code != 200:
+                continue
+            data = r.json()
+            scored += 1
+            abstained += bool(data.get("abstained"))
+            recall, rr = score_response(data.get("citations", []), q, top_k)
+            recalls.append(recall)
+            rrs.append(rr)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30.0, limits=limits, verify=os.getenv("SSL_VERIFY", "1") != "0") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    sent = len(latencies) + errors
+    non_ok = sum(n for s, n in statuses.items() if s != 200 and s != 429)
+    return {
+        "requests": sent,
+        "concurrency": concurrency,
+        "top_k": top_k,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(sent / wall, 1) if wall else None,
+        "latency_ms": {"p50": percentile(lat, 50), "p95": percentile(lat, 95), "p99": percentile(lat, 99)},
+        "status_counts": {str(s): n for s, n in sorted(statuses.items())},
+        "error_rate": round((non_ok + errors) / sent, 4) if sent else None,
+        "rate_limited_rate": round(statuses.get(429, 0) / sent, 4) if sent else None,
+        "quality": {
+            "scored": scored,
+            f"recall@{top_k}": round(sum(recalls) / scored, 4) if scored else None,
+            "mrr": round(sum(rrs) / scored, 4) if scored else None,
+            "abstain_rate": round(abstained / scored, 4) if scored else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--api", default=os.getenv("API_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--queries", type=Path, default=DEFAULT_QUERIES)
+    parser.add_argument("--tokens-file", type=Path, help="one bearer token per line; requests round-robin over them")
+    parser.add_argument("--requests", type=int, default=None, help="total requests (default: one pass over the query set)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON only")
+    args = parser.parse_args()
+
+    if args.tokens_file:
+        tokens = [t.strip() for t in args.tokens_file.read_text().splitlines() if t.strip()]
+    else:
+        tokens = [os.getenv("TOKEN", "")]
+    if not any(tokens):
+        raise SystemExit("Set TOKEN or pass --tokens-file.")
+
+    queries = load_queries(args.queries)
+    total = args.requests or len(queries)
+    report = asyncio.run(run(args.api.rstrip("/"), tokens, queries, total, args.concurrency, args.top_k))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{report['requests']} requests, concurrency {report['concurrency']}, {report['throughput_rps']} req/s")
+    print(f"latency ms  p50 {report['latency_ms']['p50']}  p95 {report['latency_ms']['p95']}  p99 {report['latency_ms']['p99']}")
+    print(f"status      {report['status_counts']}  errors {report['error_rate']}  429 {report['rate_limited_rate']}")
+    for name, value in report["quality"].items():
+        print(f"{name:<14}{value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps, rate_limit
+from app.api.routes import rag
+from app.core.rate_limiter import RateLimitResult
+from app.db.session import get_db
+from app.main import app
+from app.services.answer_gen import AnswerGenerator, StubGenerator, sse_answer
+from app.services.rag_index import Citation
+
+
+def _events(chunks):
+    out = []
+    for chunk in chunks:
+        event, data = chunk.strip().split("\n")
+        out.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return out
+
+
+async def _collect(stream):
+    return [chunk async for chunk in stream]
+
+
+def test_citations_come_first_then_tokens():
+    head = {"citations": [{"snippet": "Ishmael is the narrator."}], "abstained": False}
+    tokens = StubGenerator().stream("who narrates", ["unused"], "Ishmael is the narrator.")
+
+    async def connected():
+        return False
+
+    events = _events(asyncio.run(_collect(sse_answer(head, tokens, connected))))
+    assert events[0] == ("citations", head)
+    assert "".join(d["text"] for e, d in events if e == "token") == "Ishmael is the narrator."
+    assert events[-1] == ("done", {"abstained": False})
+
+
+def test_disconnect_cancels_slow_generation():
+    closed = []
+
+    class SlowGenerator(StubGenerator):
+        async def stream(self, question, passages, draft):
+            try:
+                yield "first "
+                await asyncio.sleep(60)
+                yield "never"
+            finally:
+                closed.append(True)
+
+    async def gone():
+        return True
+
+    async def run():
+        return await asyncio.wait_for(
+            _collect(sse_answer({"citations": [], "abstained": False}, SlowGenerator().stream("q", [], None), gone)),
+            timeout=5,
+        )
+
+    events = _events(asyncio.run(run()))
+    assert [e for e, _ in events] == ["citations", "token"]
+    assert closed == [True]
+
+
+def test_generator_must_implement_stream():
+    class Silent(AnswerGenerator):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()
+
+
+@pytest.mark.filterwarnings("error")
+def test_stream_route_sends_validated_citations(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4(), role="user", is_active=True)
+    chunk_id, document_id = str(uuid.uuid4()), str(uuid.uuid4())
+    citations = [
+        Citation(chunk_id=chunk_id, document_id=document_id, score=0.9, snippet="Ishmael is the narrator."),
+        Citation(chunk_id=None, document_id=None, score=0.1, snippet="Buy saffron.", note_id=str(uuid.uuid4())),
+    ]
+    monkeypatch.setattr(rate_limit, "check_rate_limit", lambda **kw: RateLimitResult(True, 1, 0))
+    monkeypatch.setattr(rag, "_retrieve", lambda db, current_user, payload: citations)
+    monkeypatch.setattr(rag, "extract_answer", lambda question, citations: None)
+    monkeypatch.setattr(rag, "audit", lambda *a, **kw: None)
+    monkeypatch.setattr(rag, "touch_recent_user", lambda user_id: None)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        res = TestClient(app).post("/v1/rag/query/stream", json={"question": "who narrates", "top_k": 2})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert res.status_code == 200
+    events = _events(chunk for chunk in res.text.split("\n\n") if chunk.strip())
+    assert events[0][0] == "citations"
+    assert events[0][1]["citations"][0] == {
+        "chunk_id": chunk_id, "document_id": document_id, "score": 0.9, "snippet": "Ishmael is the narrator.", "note_id": None,
+    }
+    assert "".join(d["text"] for e, d in events if e == "token") == "Ishmael is the narrator."
+    assert events[-1] == ("done", {"abstained": False})
@@ -0,0 +1,74 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.services import audit as audit_mod
+from app.services.audit import audit, flush_audit_buffer
+
+
+class FakeDB:
+    def __init__(self):
+        self.added = []
+        self.commits = 0
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    def commit(self):
+        self.commits += 1
+
+
+def test_buffered_events_are_flushed_in_batches(monkeypatch):
+    batches = []
+    monkeypatch.setattr(audit_mod, "_thread", object())
+    monkeypatch.setattr(audit_mod, "_insert", lambda rows: batches.append(list(rows)))
+    monkeypatch.setattr(audit_mod.settings, "audit_batch_size", 2)
+
+    db = FakeDB()
+    for i in range(3):
+        audit(db, uuid.uuid4(), "rag.query", {"file_id": uuid.uuid4(), "i": i})
+
+    assert db.commits == 0
+    assert flush_audit_buffer() == 3
+    assert [len(b) for b in batches] == [2, 1]
+    # UUIDs in details are stringified up front so they serialise as JSONB
+    assert isinstance(batches[0][0]["details"]["file_id"], str)
+
+
+def test_durable_events_commit_inline(monkeypatch):
+    monkeypatch.setattr(audit_mod, "_thread", object())
+    db = FakeDB()
+    audit(db, uuid.uuid4(), "auth.login", {"role": "user"}, durable=True)
+    assert db.commits == 1
+    assert db.added[0].event_type == "auth.login"
+
+
+class WindowDB:
+    """
+    Records each month window list_audit_logs queries; returns no rows.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def scalars(self, stmt):
+        self.calls += 1
+        return SimpleNamespace(all=lambda: [])
+
+
+def test_audit_log_range_accepts_naive_datetimes():
+    from app.api.routes.admin import list_audit_logs
+
+    db = WindowDB()
+    page = list_audit_logs(since=datetime(2026, 5, 1), until=datetime(2026, 6, 15), limit=50, cursor=None, db=db)
+    assert page.items == []
+    # June 1-15, then May
+    assert db.calls == 2
+
+
+def test_month_start_uses_the_utc_month():
+    from app.services.audit_partitions import month_start
+
+    plus_two = timezone(timedelta(hours=2))
+    assert month_start(datetime(2026, 7, 1, 1, 0, tzinfo=plus_two)) == datetime(2026, 6, 1, tzinfo=timezone.utc)
+    assert month_start(datetime(2026, 7, 1, 1, 0)) == datetime(2026, 7, 1, tzinfo=timezone.utc)
@@ -0,0 +1,75 @@
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.api.deps import get_current_user
+from app.core.auth_cache import invalidate_user
+from app.core.cache import TTLCache
+from app.core.security import create_access_token
+
+
+class CountingDB:
+    def __init__(self, user):
+        self.user = user
+        self.calls = 0
+
+    def scalar(self, stmt):
+        self.calls += 1
+        return self.user
+
+
+def _user(**kw):
+    base = dict(id=uuid.uuid4(), email="a@example.com", role="user", is_active=True, created_at=datetime.now(timezone.utc))
+    base.update(kw)
+    return SimpleNamespace(**base)
+
+
+def test_ttl_cache_expires_and_evicts_lru():
+    c = TTLCache(max_entries=2, ttl_seconds=60)
+    c.set("a", 1)
+    c.set("b", 2)
+    c.get("a")
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1
+
+    c.set("d", 4, expires_at=time.monotonic() - 1)
+    assert c.get("d") is None
+
+
+def test_current_user_is_cached_until_invalidated():
+    user = _user()
+    db = CountingDB(user)
+    token = create_access_token(subject=str(user.id), role=user.role)
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    first = get_current_user(creds, db)
+    second = get_current_user(creds, db)
+    assert first.id == second.id == user.id
+    assert db.calls == 1
+
+    invalidate_user(user.id)
+    get_current_user(creds, db)
+    assert db.calls == 2
+
+
+def test_row_read_before_invalidation_is_not_cached():
+    user = _user()
+    token = create_access_token(subject=str(user.id), role=user.role)
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    class RacingDB(CountingDB):
+        def scalar(self, stmt):
+            row = super().scalar(stmt)
+            # An admin deactivates the user while this request holds the old row
+            if self.calls == 1:
+                invalidate_user(user.id)
+            return row
+
+    db = RacingDB(user)
+    get_current_user(creds, db)
+    get_current_user(creds, db)
+    assert db.calls == 2
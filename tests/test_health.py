@@ -7,3 +7,13 @@ def test_health():
     r = client.get("/v1/health")
     assert r.status_code == 200
     assert r.json() == {"status": "ok"}
+
+
+def test_request_id_and_csp_headers():
+    r = client.get("/v1/health", headers={"X-Request-ID": "abc-123"})
+    assert r.headers["X-Request-ID"] == "abc-123"
+    assert r.headers["Content-Security-Policy"] == "default-src 'none'; frame-ancestors 'none';"
+
+    r = client.get("/openapi.json")
+    assert len(r.headers["X-Request-ID"]) == 36
+    assert "cdn.jsdelivr.net" in r.headers["Content-Security-Policy"]
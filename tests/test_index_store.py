@@ -0,0 +1,138 @@
+import hashlib
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import index_store, index_sync, rag_index
+from app.services.index_store import CachedIndexStore, IndexStore, S3IndexStore
+
+
+class NoSuchKey(Exception):
+    response = {"Error": {"Code": "NoSuchKey"}}
+
+
+class FakeS3:
+    """
+    In-memory stand-in for an S3-compatible client (the calls S3IndexStore makes).
+    """
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], bytes] = {}
+        self.downloads = 0
+
+    def _obj(self, Bucket, Key):
+        try:
+            return self.objects[(Bucket, Key)]
+        except KeyError:
+            raise NoSuchKey()
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+        return {"ETag": hashlib.md5(Body).hexdigest()}
+
+    def get_object(self, Bucket, Key):
+        self.downloads += 1
+        return {"Body": SimpleNamespace(read=lambda data=self._obj(Bucket, Key): data)}
+
+    def head_object(self, Bucket, Key):
+        return {"ETag": hashlib.md5(self._obj(Bucket, Key)).hexdigest()}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+def test_read_through_cache_downloads_only_changed_artifacts(tmp_path):
+    s3 = FakeS3()
+    store = CachedIndexStore(S3IndexStore("idx", "rag/", client=s3), tmp_path)
+    assert store.get("a.joblib") is None
+
+    store.put("a.joblib", b"v1")
+    assert store.get("a.joblib") == b"v1"
+    assert s3.downloads == 0  # our own write is already cached locally
+
+    # Another node publishes a new version
+    S3IndexStore("idx", "rag/", client=s3).put("a.joblib", b"v2")
+    assert store.get("a.joblib") == b"v2"
+    assert store.get("a.joblib") == b"v2"
+    assert s3.downloads == 1
+
+    store.delete("a.joblib")
+    assert store.get("a.joblib") is None
+
+
+def test_cached_copy_keeps_blob_and_version_together(tmp_path):
+    s3 = FakeS3()
+    remote = S3IndexStore("idx", "rag/", client=s3)
+    store = CachedIndexStore(remote, tmp_path)
+    old_version = remote.put("m.json", b"old")
+    new_version = store.put("m.json", b"new")
+
+    # A slower worker finishes refreshing the old manifest after the new one was cached
+    store._remember("m.json", b"old", old_version)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["m.json"]
+    assert store.get("m.json") == b"new"
+    assert store._cached("m.json") == (new_version, b"new")
+
+
+def test_rag_index_round_trip_through_s3(tmp_path, monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(index_store.settings, "rag_index_store", "s3")
+    monkeypatch.setattr(index_store, "_remote_store", CachedIndexStore(S3IndexStore("idx", client=s3), tmp_path / "cache"))
+    monkeypatch.setattr(rag_index, "DATA_DIR", tmp_path / "local")
+
+    user_id = str(uuid.uuid4())
+    chunk = SimpleNamespace(id=uuid.uuid4(), document_id=uuid.uuid4(), text="The Pequod sailed from Nantucket.", meta_data=None)
+    db = SimpleNamespace(
+        scalars=lambda stmt: SimpleNamespace(all=lambda: [chunk]),
+        execute=lambda stmt: SimpleNamespace(all=lambda: []),
+    )
+    rag_index.rebuild_index_user(db, user_id)
+
+    assert ("idx", rag_index.user_index_name(user_id)) in s3.objects
+    assert not rag_index.user_index_path(user_id).exists()
+    assert rag_index.query_index_user(db, user_id, "Pequod", top_k=1)[0].chunk_id == str(chunk.id)
+
+
+def test_remote_cache_is_evicted_by_events_and_reconciliation(tmp_path, monkeypatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(index_store.settings, "rag_index_store", "s3")
+    monkeypatch.setattr(index_store, "_remote_store", CachedIndexStore(S3IndexStore("idx", client=s3), tmp_path))
+    for cached in list(rag_index._index_cache):
+        rag_index.evict_cached_index(cached)
+
+    user_id = str(uuid.uuid4())
+    chunk = SimpleNamespace(id=uuid.uuid4(), document_id=uuid.uuid4(), text="The Pequod sailed from Nantucket.", meta_data=None)
+    db = SimpleNamespace(
+        scalars=lambda stmt: SimpleNamespace(all=lambda: [chunk]),
+        execute=lambda stmt: SimpleNamespace(all=lambda: []),
+    )
+    rag_index.rebuild_index_user(db, user_id)
+    rag_index._load_index(db, user_id)
+
+    # Another node's rebuild: announced over pub/sub
+    index_sync._on_index_changed(json.dumps({"user_id": user_id, "origin": "other-node"}))
+    assert user_id not in rag_index._index_cache
+
+    # A missed event: the stamp no longer matches the store
+    rag_index._load_index(db, user_id)
+    stamp, payload, size = rag_index._index_cache[user_id]
+    rag_index._index_cache[user_id] = (("stale", None), payload, size)
+    assert rag_index.reconcile_index_cache() == 1
+    assert user_id not in rag_index._index_cache
+
+
+def test_store_must_implement_every_operation():
+    class NoVersion(IndexStore):
+        def get(self, name):
+            return None
+
+        def put(self, name, data):
+            return "v"
+
+        def delete(self, name):
+            pass
+
+    with pytest.raises(TypeError):
+        NoVersion()
@@ -0,0 +1,60 @@
+import threading
+from collections import OrderedDict, deque
+
+import pytest
+
+from app.services import ingest_scheduler as sched
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    # Fresh queues and a fake worker, so jobs stay queued for _pick() to inspect
+    monkeypatch.setattr(sched, "_queues", {})
+    monkeypatch.setattr(sched, "_active", deque())
+    monkeypatch.setattr(sched, "_deficit", {})
+    monkeypatch.setattr(sched, "_granted", set())
+    monkeypatch.setattr(sched, "_threads", [object()])
+    monkeypatch.setattr(sched.settings, "rag_ingest_quantum_bytes", 100)
+
+
+def test_deficit_round_robin_shares_by_bytes(queues):
+    # "big" queued a corpus of large uploads before "small" showed up
+    for i in range(4):
+        sched.submit_ingest("big", 250, print, f"big-{i}")
+    for i in range(4):
+        sched.submit_ingest("small", 50, print, f"small-{i}")
+
+    order = []
+    while (picked := sched._pick()) is not None:
+        order.append(picked[1].args[0])
+
+    # One 250-byte upload per ~2.5 turns for "big", two 50-byte uploads per turn for "small"
+    assert order[:4] == ["small-0", "small-1", "small-2", "small-3"]
+    assert sorted(order[4:]) == [f"big-{i}" for i in range(4)]
+
+
+def test_backlog_limit_rejects_with_retry_after(queues, monkeypatch):
+    monkeypatch.setattr(sched.settings, "rag_ingest_max_tenant_backlog", 2)
+    sched.check_ingest_admission("t1")
+    sched.submit_ingest("t1", 10, print)
+    sched.submit_ingest("t1", 10, print)
+
+    with pytest.raises(sched.IngestBacklogFull) as e:
+        sched.check_ingest_admission("t1")
+    assert e.value.retry_after >= 1
+    # Other tenants are still admitted
+    sched.check_ingest_admission("t2")
+    assert sched.ingest_scheduler_stats()["tenants"]["t1"]["depth"] == 2
+
+
+def test_single_job_tenants_get_a_wait_sample(monkeypatch):
+    monkeypatch.setattr(sched, "_wait_ewma", OrderedDict())
+    monkeypatch.setattr(sched.settings, "rag_ingest_workers", 1)
+    done = threading.Event()
+    sched.start_ingest_scheduler()
+    try:
+        assert sched.submit_ingest("solo", 10, done.set)
+        assert done.wait(5)
+    finally:
+        sched.stop_ingest_scheduler()
+    assert "solo" in sched.ingest_scheduler_stats()["recent_tenants"]
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import uuid
+
+from app.services.ingest_status import ingest_progress, publish_ingest_status, wait_for_ingest, watch_ingest
+
+
+def test_long_poll_wakes_on_terminal_status():
+    doc_id = str(uuid.uuid4())
+
+    def job():
+        publish_ingest_status(doc_id, "processing", "inserting", 500, 1200)
+        publish_ingest_status(doc_id, "processing", "indexing", 1200, 1200)
+        publish_ingest_status(doc_id, "ready", "done", 1200, 1200)
+
+    async def run():
+        with watch_ingest(doc_id) as events:
+            # Events come from the ingestion thread, not the event loop
+            threading.Thread(target=job).start()
+            return await wait_for_ingest(events, timeout=5)
+
+    event = asyncio.run(run())
+    assert (event["status"], event["chunks_inserted"]) == ("ready", 1200)
+    # Terminal documents are read from the row again
+    assert ingest_progress(doc_id) is None
+
+
+def test_progress_is_tracked_and_wait_times_out():
+    doc_id = str(uuid.uuid4())
+    publish_ingest_status(doc_id, "processing", "inserting", 500, 1200)
+    assert ingest_progress(doc_id)["phase"] == "inserting"
+
+    async def run():
+        with watch_ingest(doc_id) as events:
+            return await wait_for_ingest(events, timeout=0.05)
+
+    assert asyncio.run(run()) is None
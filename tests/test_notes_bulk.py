@@ -0,0 +1,70 @@
+import asyncio
+import json
+import threading
+import uuid
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.api.routes import notes
+from app.db.session import get_db
+from app.main import app
+
+
+def test_ndjson_import_batches_and_reports_bad_lines(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4(), role="user", is_active=True)
+    batches = []
+    monkeypatch.setattr(notes, "copy_notes", lambda owner_id, rows: batches.append(list(rows)) or len(rows))
+    monkeypatch.setattr(notes, "audit", lambda *a, **kw: None)
+    monkeypatch.setattr(notes, "invalidate_total", lambda *a: None)
+    monkeypatch.setattr(notes, "reindex_user_job", lambda user_id: None)
+    monkeypatch.setattr(notes.settings, "notes_import_batch_size", 2)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        lines = [json.dumps({"title": f"t{i}", "content": "c"}) for i in range(5)]
+        lines.insert(2, "{not json")
+        lines.insert(4, json.dumps({"title": "missing content"}))
+        res = TestClient(app).post("/v1/notes/import", content="\n".join(lines) + "\n")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["imported"] == 5 and body["failed"] == 2
+    assert [e["line"] for e in body["errors"]] == [3, 5]
+    assert [len(b) for b in batches] == [2, 2, 1]
+
+
+def test_import_stopped_by_long_line_accounts_for_committed_batches(monkeypatch):
+    user = SimpleNamespace(id=uuid.uuid4(), role="user", is_active=True)
+    audited, reindexed, on_loop = [], threading.Event(), []
+
+    def blocking(record):
+        # audit and invalidate_total may block on the DB/Redis: they must run off the event loop
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(record)
+        except RuntimeError:
+            pass
+
+    monkeypatch.setattr(notes, "copy_notes", lambda owner_id, rows: len(rows))
+    monkeypatch.setattr(notes, "audit", lambda db, uid, event, details: blocking("audit") or audited.append(details))
+    monkeypatch.setattr(notes, "invalidate_total", lambda *a: blocking("invalidate_total"))
+    monkeypatch.setattr(notes, "reindex_user_job", lambda user_id: reindexed.set())
+    monkeypatch.setattr(notes.settings, "notes_import_batch_size", 2)
+    monkeypatch.setattr(notes.settings, "notes_import_max_line_bytes", 100)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[get_db] = lambda: None
+    try:
+        lines = [json.dumps({"title": f"t{i}", "content": "c"}) for i in range(3)] + ["x" * 500]
+        res = TestClient(app).post("/v1/notes/import", content="\n".join(lines))
+    finally:
+        app.dependency_overrides.clear()
+
+    assert res.status_code == 413
+    assert "2 notes before it were imported" in res.json()["detail"]
+    assert audited == [{"role": "user", "imported": 2, "failed": 0, "aborted": True}]
+    assert on_loop == []
+    assert reindexed.wait(5)
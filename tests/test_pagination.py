@@ -0,0 +1,80 @@
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.api.pagination import decode_cursor, encode_cursor
+from app.api.routes.notes import search_notes
+from app.services.audit_partitions import add_months, month_start, partition_name
+
+
+def test_cursor_roundtrip():
+    ts = datetime(2026, 3, 4, 5, 6, 7, 123456, tzinfo=timezone.utc)
+    rid = uuid.uuid4()
+    assert decode_cursor(encode_cursor(ts, rid)) == (ts, rid)
+
+
+def test_invalid_cursor_is_400():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_month_arithmetic_for_partitions():
+    start = month_start(datetime(2026, 11, 20, 13, 0, tzinfo=timezone.utc))
+    assert start == datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert add_months(start, 2) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+    assert add_months(start, -11) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+    assert partition_name(start) == "audit_logs_y2026m11"
+
+
+_SearchRow = namedtuple("_SearchRow", "id title created_at updated_at rank highlight")
+
+
+class Float4RankDB:
+    """
+    Postgres as far as search_notes' page query goes: ts_rank_cd is float4. psycopg2 returns
+    a float4 as its shortest decimal (0.1), while comparing it to a float8 parameter widens
+    it (0.10000000149...); a cast to float8 in the query returns the widened value instead.
+    """
+
+    def __init__(self, ranks: dict[uuid.UUID, float]):
+        self.ranks = ranks
+
+    def execute(self, stmt):
+        compiled = stmt.compile(dialect=postgresql.dialect())
+        exact = "AS FLOAT(53)" in str(compiled)
+        params = compiled.params
+        # param_1/param_2 are the cursor and param_3 the limit; without a cursor param_1 is the limit
+        after = (params["param_1"], params["param_2"]) if "param_3" in params else None
+        limit = params["param_3"] if after else params["param_1"]
+        rows = []
+        for note_id, rank in self.ranks.items():
+            stored = float(np.float32(rank))
+            if after and not (stored, note_id) < after:
+                continue
+            returned = stored if exact else float(str(np.float32(rank)))
+            rows.append(_SearchRow(note_id, "t", None, None, returned, ""))
+        rows.sort(key=lambda r: (r.rank, r.id), reverse=True)
+        return SimpleNamespace(all=lambda: rows[:limit])
+
+
+def test_search_cursor_splits_equal_ranks_exactly():
+    ids = [uuid.uuid4(), uuid.uuid4(), uuid.uuid4()]
+    db = Float4RankDB({ids[0]: 0.1, ids[1]: 0.1, ids[2]: 0.05})
+    user = SimpleNamespace(id=uuid.uuid4())
+
+    seen, cursor = [], None
+    for _ in range(4):
+        page = search_notes("whale", 1, cursor, db, user)
+        seen += [item["id"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    # The page boundary falls between the two notes tied on rank: neither is skipped or repeated
+    assert seen == sorted(ids[:2], reverse=True) + [ids[2]]
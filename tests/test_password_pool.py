@@ -0,0 +1,23 @@
+import threading
+
+import pytest
+
+from app.core import password_pool
+from app.core.password_pool import PasswordPoolSaturated, password_pool_stats, pool_hash_password, pool_verify_password
+
+
+def test_hash_and_verify_through_pool():
+    h = pool_hash_password("correct horse battery")
+    assert pool_verify_password("correct horse battery", h)
+    assert not pool_verify_password("wrong password", h)
+    assert password_pool_stats()["completed"] >= 3
+
+
+def test_saturated_pool_rejects_with_retry_after(monkeypatch):
+    monkeypatch.setattr(password_pool, "_slots", threading.BoundedSemaphore(1))
+    password_pool._slots.acquire()
+
+    with pytest.raises(PasswordPoolSaturated) as exc:
+        pool_hash_password("correct horse battery")
+    assert exc.value.retry_after > 0
+    assert password_pool_stats()["rejected"] >= 1
@@ -0,0 +1,247 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import rag_index
+from app.services.rag_index import apply_note_delta, query_index_user, rebuild_index_user
+
+
+class _Result(list):
+    def all(self):
+        return list(self)
+
+
+class FakeSession:
+    """
+    Just enough Session for rag_index: chunk rows, note rows and db.get(Note, id).
+    """
+
+    def __init__(self, user_id, chunks, notes):
+        self.user_id = user_id
+        self.chunks = chunks
+        self.notes = notes
+
+    def scalars(self, stmt):
+        self.chunk_stmt = stmt
+        return _Result(self.chunks)
+
+    def execute(self, stmt):
+        return _Result(self.notes.values())
+
+    def get(self, model, key):
+        return self.notes.get(str(key))
+
+
+@pytest.fixture
+def session(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_index, "DATA_DIR", tmp_path)
+    user_id = str(uuid.uuid4())
+    doc_id = uuid.uuid4()
+    chunks = [
+        SimpleNamespace(id=uuid.uuid4(), document_id=doc_id, text="The whale ship Pequod sailed from Nantucket.", meta_data=None),
+        SimpleNamespace(id=uuid.uuid4(), document_id=doc_id, text="Ishmael is the narrator of the story.", meta_data=None),
+    ]
+    return FakeSession(user_id, chunks, {})
+
+
+def _add_note(db, title, content):
+    nid = uuid.uuid4()
+    db.notes[str(nid)] = SimpleNamespace(id=nid, owner_id=uuid.UUID(db.user_id), title=title, content=content)
+    return str(nid)
+
+
+def test_note_edits_are_applied_as_deltas(session):
+    db = session
+    rebuild_index_user(db, db.user_id)
+
+    nid = _add_note(db, "Groceries", "Buy saffron and cardamom for the curry.")
+    apply_note_delta(db, db.user_id, nid)
+    assert rag_index.user_delta_path(db.user_id).exists()
+
+    top = query_index_user(db, db.user_id, "saffron cardamom", top_k=3)[0]
+    assert top.note_id == nid
+    assert top.chunk_id is None and top.document_id is None
+
+    db.notes[nid].content = "Buy lemongrass instead."
+    apply_note_delta(db, db.user_id, nid)
+    hits = query_index_user(db, db.user_id, "saffron cardamom", top_k=3)
+    assert all(h.note_id != nid or "saffron" not in h.snippet for h in hits)
+
+    del db.notes[nid]
+    apply_note_delta(db, db.user_id, nid)
+    hits = query_index_user(db, db.user_id, "lemongrass", top_k=3)
+    assert all(h.note_id != nid for h in hits)
+
+    top = query_index_user(db, db.user_id, "who is the narrator", top_k=3)[0]
+    assert "Ishmael" in top.snippet
+
+
+def test_rebuild_folds_delta_into_base(session):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    nid = _add_note(db, "Trip", "Pack the snorkel for the reef.")
+    apply_note_delta(db, db.user_id, nid)
+
+    rebuild_index_user(db, db.user_id)
+    assert not rag_index.user_delta_path(db.user_id).exists()
+    assert query_index_user(db, db.user_id, "snorkel reef", top_k=1)[0].note_id == nid
+
+
+def test_note_edit_waits_for_a_running_rebuild(session):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    nid = _add_note(db, "Groceries", "Buy saffron and cardamom for the curry.")
+
+    with rag_index._rebuild_lock(db.user_id):
+        edit = threading.Thread(target=apply_note_delta, args=(db, db.user_id, nid))
+        edit.start()
+        edit.join(0.2)
+        assert edit.is_alive()
+        # A rebuild that read the notes before the edit replaces the base meanwhile
+        note = db.notes.pop(nid)
+        rebuild_index_user(db, db.user_id)
+        db.notes[nid] = note
+    edit.join(5)
+
+    # The edit was built against the new base, so it isn't ignored as stale
+    assert query_index_user(db, db.user_id, "saffron cardamom", top_k=1)[0].note_id == nid
+    assert not rag_index._rebuild_locks
+
+
+def test_loaded_index_is_cached_until_files_change(session, monkeypatch):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    first = rag_index._load_index(db, db.user_id)
+    assert rag_index._load_index(db, db.user_id) is first
+
+    apply_note_delta(db, db.user_id, _add_note(db, "Trip", "Pack the snorkel."))
+    assert rag_index._load_index(db, db.user_id) is not first
+
+    # Warm-up never evicts: with no room left it reports False and leaves the hot entry alone
+    current = rag_index._load_index(db, db.user_id)
+    monkeypatch.setattr(rag_index.settings, "rag_index_cache_max_mb", 0)
+    assert rag_index.warm_user_index(db, db.user_id) is False
+    assert rag_index._index_cache[db.user_id][1] is current
+
+
+def test_warm_up_skips_users_without_a_published_index(session, monkeypatch):
+    db = session
+    monkeypatch.setattr(rag_index, "rebuild_index_user", lambda db, user_id: pytest.fail("warm-up rebuilt"))
+    assert rag_index.warm_user_index(db, db.user_id) is None
+    assert db.user_id not in rag_index._index_cache
+
+
+def test_corrupt_artifact_is_rebuilt_once(session, monkeypatch):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    manifest = rag_index._read_manifest(db.user_id, "index")
+    (rag_index.DATA_DIR / manifest["artifact"]).write_bytes(b"truncated")
+    rag_index.evict_cached_index(db.user_id)
+
+    rebuilds = []
+    real_rebuild = rag_index.rebuild_index_user
+
+    def counting_rebuild(db, user_id):
+        rebuilds.append(user_id)
+        real_rebuild(db, user_id)
+
+    monkeypatch.setattr(rag_index, "rebuild_index_user", counting_rebuild)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: query_index_user(db, db.user_id, "narrator", top_k=1), range(4)))
+
+    assert len(rebuilds) == 1
+    assert all("Ishmael" in r[0].snippet for r in results)
+    assert not rag_index._rebuild_locks
+
+
+def test_rebuild_waits_for_the_lock_held_by_another_worker(session, monkeypatch):
+    db = session
+
+    class HeldElsewhere:
+        def acquire(self):
+            return False
+
+    monkeypatch.setattr(rag_index, "get_redis", lambda: SimpleNamespace(lock=lambda *a, **kw: HeldElsewhere()))
+    monkeypatch.setattr(rag_index, "rebuild_index_user", lambda db, user_id: pytest.fail("rebuilt under a held lock"))
+    with pytest.raises(rag_index.IndexUnavailable):
+        rag_index._load_index(db, db.user_id)
+    assert not rag_index._rebuild_locks
+
+
+def test_sharded_scoring_matches_single_matrix(session, monkeypatch):
+    db = session
+    for i in range(6):
+        _add_note(db, f"Log {i}", "whale " * (i + 1) + f"sighting number {i} near the Pequod.")
+    rebuild_index_user(db, db.user_id)
+    single = query_index_user(db, db.user_id, "whale sighting pequod", top_k=5, dedupe=False)
+
+    monkeypatch.setattr(rag_index.settings, "rag_shard_min_rows", 2)
+    monkeypatch.setattr(rag_index.settings, "rag_shard_workers", 3)
+    rag_index.evict_cached_index(db.user_id)
+    assert len(rag_index._load_index(db, db.user_id)["shards"]) == 3
+
+    sharded = query_index_user(db, db.user_id, "whale sighting pequod", top_k=5, dedupe=False)
+    assert [(c.note_id, c.chunk_id) for c in sharded] == [(c.note_id, c.chunk_id) for c in single]
+    assert [round(c.score, 6) for c in sharded] == [round(c.score, 6) for c in single]
+
+
+def test_extract_answer_picks_best_sentence(session):
+    db = session
+    nid = _add_note(db, "Voyage", "We left at dawn. The harpooner Queequeg shared Ishmael's room at the inn. It rained.")
+    rebuild_index_user(db, db.user_id)
+    apply_note_delta(db, db.user_id, _add_note(db, "Crew", "Starbuck is the first mate. He distrusts Ahab."))
+
+    hits = query_index_user(db, db.user_id, "who shared the room at the inn", top_k=3)
+    assert hits[0].note_id == nid
+    answer = rag_index.extract_answer("who shared the room at the inn", hits)
+    assert answer.startswith("The harpooner Queequeg shared")
+
+    hits = query_index_user(db, db.user_id, "first mate", top_k=3)
+    # Short best sentence is extended with the next one
+    assert rag_index.extract_answer("first mate", hits).endswith("Starbuck is the first mate. He distrusts Ahab.")
+
+    # An edit landing between retrieval and extraction doesn't shift the citations' rows
+    apply_note_delta(db, db.user_id, _add_note(db, "Galley", "The cook fried the first mate an egg at dawn."))
+    assert rag_index.extract_answer("first mate", hits).endswith("Starbuck is the first mate. He distrusts Ahab.")
+
+
+def test_near_duplicate_chunks_are_collapsed(session, monkeypatch):
+    db = session
+    footer = "Confidential. Do not distribute this whaling report outside the Nantucket office without approval."
+    doc_id = db.chunks[0].document_id
+    first = SimpleNamespace(id=uuid.uuid4(), document_id=doc_id, text=footer, meta_data=None)
+    # Same boilerplate, different case and punctuation
+    again = SimpleNamespace(id=uuid.uuid4(), document_id=doc_id, text=footer.upper().replace(".", "!"), meta_data=None)
+    db.chunks += [first, again]
+    rebuild_index_user(db, db.user_id)
+
+    payload = rag_index._load_index(db, db.user_id)
+    assert len(payload["chunk_ids"]) == 3
+    assert payload["id_to_row"][str(again.id)] == payload["id_to_row"][str(first.id)]
+
+    # Ingestion flags new copies against the published LSH table (without loading the
+    # index) and against each other
+    monkeypatch.setattr(rag_index, "_fetch_base", lambda user_id: pytest.fail("loaded the index"))
+    sig = rag_index.simhash(footer + "!")
+    new_ids = [str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4())]
+    unique = rag_index.simhash("Queequeg carved his coffin into a life buoy.")
+    assert rag_index.near_duplicate_chunks(db.user_id, new_ids, [unique, sig, unique]) == [None, str(first.id), new_ids[0]]
+    assert rag_index._read_manifest(db.user_id, "lsh")["size"] < 10_000
+
+
+def test_rebuild_reads_an_uploads_chunks_in_document_order(session):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    # Chunks inserted in one transaction share created_at; the first copy of a near-duplicate must stay first
+    order = [str(c.element) for c in db.chunk_stmt._order_by_clauses]
+    assert order == ["chunks.created_at", "chunks.document_id", "chunks.chunk_index"]
+
+
+def test_small_index_has_a_small_artifact(session):
+    db = session
+    rebuild_index_user(db, db.user_id)
+    # Only the IDF of columns present in the corpus is stored, not a dense 2**20 vector
+    assert rag_index._read_manifest(db.user_id, "index")["size"] < 200_000
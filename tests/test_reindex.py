@@ -0,0 +1,51 @@
+import json
+
+from app.services import reindex
+from app.services.rag_index import INDEX_FORMAT
+
+
+def _fake_rebuild(calls, fail=()):
+    def rebuild(user_id):
+        calls.append(user_id)
+        error = "boom" if user_id in fail else None
+        return {"user_id": user_id, "format": INDEX_FORMAT, "seconds": 0.01, "bytes": None if error else 100, "error": error}
+    return rebuild
+
+
+def _rebuild_in_child(user_id):
+    # Module-level, so the spawn pool can pickle it
+    return {"user_id": user_id, "format": INDEX_FORMAT, "seconds": 0.01, "bytes": 100, "error": None}
+
+
+def test_reindex_resumes_from_checkpoint(tmp_path):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    calls = []
+    summary = reindex.run_reindex(["a", "b", "c"], checkpoint, 1, 0, rebuild=_fake_rebuild(calls, fail={"b"}))
+    assert calls == ["a", "b", "c"]
+    assert (summary["rebuilt"], summary["failed"], summary["bytes"]) == (2, 1, 200)
+
+    # Interrupted mid-write: the partial line is ignored
+    with checkpoint.open("a") as f:
+        f.write('{"user_id": "d", "for')
+
+    calls.clear()
+    summary = reindex.run_reindex(["a", "b", "c", "d"], checkpoint, 1, 0, rebuild=_fake_rebuild(calls))
+    assert calls == ["b", "d"]
+    assert summary["skipped"] == 2
+
+    # Users outside this run don't count as skipped
+    summary = reindex.run_reindex(iter(["c", "e"]), checkpoint, 1, 0, rebuild=_fake_rebuild(calls))
+    assert (summary["skipped"], summary["rebuilt"]) == (1, 1)
+    assert reindex.read_checkpoint(checkpoint) == {"a", "b", "c", "d", "e"}
+
+    # Older formats in the checkpoint don't count as done
+    checkpoint.write_text(json.dumps({"user_id": "a", "format": INDEX_FORMAT - 1, "error": None}) + "\n")
+    assert reindex.read_checkpoint(checkpoint) == set()
+
+
+def test_reindex_in_a_process_pool(tmp_path):
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    users = [f"user-{i}" for i in range(5)]
+    summary = reindex.run_reindex(users, checkpoint, 2, 0, rebuild=_rebuild_in_child)
+    assert (summary["rebuilt"], summary["failed"], summary["bytes"]) == (5, 0, 500)
+    assert reindex.read_checkpoint(checkpoint) == set(users)
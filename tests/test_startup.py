@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+# Generous: catches an eager ML import (seconds), not machine-to-machine noise
+IMPORT_BUDGET_MS = int(os.getenv("IMPORT_BUDGET_MS", "5000"))
+HEAVY = ("sklearn", "scipy", "numpy", "joblib")
+
+
+def importtime(module: str) -> dict[str, int]:
+    """
+    Cumulative import time in microseconds per module, from python -X importtime.
+    """
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_app_import_skips_ml_stack_and_fits_budget():
+    times = importtime("app.main")
+    assert not [m for m in times if m.split(".")[0] in HEAVY]
+    assert times["app.main"] / 1000 < IMPORT_BUDGET_MS